@@ -1,16 +1,102 @@
-from flask import Flask, render_template, request, jsonify
-from sqlalchemy import create_engine
-import os
+from flask import Flask, render_template, request, jsonify, g, abort
+import math, os, time
+from datetime import date
 
-# Import your existing functions from your python file
-# Assuming your script is named 'logic.py'
-from backend import get_store_rankings 
+# Web path only needs the ranking side; feed import code (ingest.py) is never loaded here
+from models import check_schema, create_read_engine
+from ranking import get_store_rankings, get_price_index, get_fresh_price_index, get_category_resolver, BasketState
+from basket_sessions import BasketSessions
+from search_cache import SearchCache, normalize_items, snap_coords
+from history import get_price_trend, get_basket_prices_on
+from optimizer import get_split_plans
+from units import parse_item_spec
+from metrics import REGISTRY, timer, observe, start_trace, end_trace, server_timing
+from snapshot import load_snapshot
 
 app = Flask(__name__, template_folder=".", static_folder="assets")
 
+# Stage histograms and counters for /metrics (per worker process); PRICE_METRICS=0 turns them off
+REGISTRY.enabled = os.environ.get("PRICE_METRICS", "1") != "0"
+
 # Connect to your existing DB
-db_path = "price_comparison.db"
-engine = create_engine(f"sqlite:///{db_path}")
+db_path = os.environ.get("PRICE_DB", "price_comparison.db")
+# Requests only read: pooled query_only connections, safe to share across worker threads
+engine = create_read_engine(db_path, pool_size=int(os.environ.get("PRICE_DB_POOL", 8)))
+# Migrating is a deploy step (cli.py migrate), never done by web workers; refuse to serve an old schema
+check_schema(engine)
+# Ranking data from a snapshot file written after each import (cli.py snapshot / import --snapshot):
+# memory-mapped, so all workers share one copy and start without reading the DB
+snapshot_path = os.environ.get("PRICE_SNAPSHOT")
+if snapshot_path:
+    load_snapshot(snapshot_path)
+else:
+    # Build the (store, category) price index once, not per request
+    get_price_index(engine)
+    get_category_resolver(engine)
+# Serialized /api/search responses; emptied whenever the price index picks up a new import
+search_cache = SearchCache()
+# Per-client running basket totals for /api/basket, capped at PRICE_BASKET_MB per worker
+basket_sessions = BasketSessions(max_bytes=int(os.environ.get("PRICE_BASKET_MB", 64)) * 2**20)
+
+def number_param(data, name, cast=int, minimum=1, default=None):
+    """data[name] as cast (int/float) >= minimum, default if missing or null; 400 otherwise."""
+    value = data.get(name)
+    if value is None:
+        return default
+    try:
+        if isinstance(value, bool): raise ValueError
+        number = cast(value)
+        if not (math.isfinite(number) and number >= minimum): raise ValueError
+    except (TypeError, ValueError):
+        abort(400, description=f"{name} must be a number >= {minimum}")
+    return number
+def date_param(data, name, default=None):
+    """data[name] as a date from 'YYYY-MM-DD', default if missing or empty; 400 otherwise."""
+    value = data.get(name)
+    if not value:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        abort(400, description=f"{name} must be a YYYY-MM-DD date")
+def ranking_options(data):
+    """top_k / radius_km / max_stores from a request body, validated."""
+    return {"top_k": number_param(data, 'top_k'), "radius_km": number_param(data, 'radius_km', float, 0),
+            "max_stores": number_param(data, 'max_stores')}
+
+def ranking_data():
+    """(price_index, resolver) for this request: the snapshot when configured, else the DB-built index."""
+    if snapshot_path:
+        _, price_index, resolver = load_snapshot(snapshot_path)
+        return price_index, resolver
+    return get_fresh_price_index(engine), get_category_resolver(engine)
+
+@app.before_request
+def start_timing():
+    g.started = time.perf_counter()
+    # Per-request profiling: ?profile=1 or an X-Profile header returns stage timings in Server-Timing
+    g.profiling = request.args.get('profile') == '1' or 'X-Profile' in request.headers
+    if g.profiling:
+        start_trace()
+
+@app.after_request
+def finish_timing(response):
+    if request.endpoint:
+        observe(f"http.{request.endpoint}", (time.perf_counter() - g.started) * 1000)
+    if g.get('profiling'):
+        trace = end_trace()
+        total = (time.perf_counter() - g.started) * 1000
+        response.headers['Server-Timing'] = ", ".join(filter(None, [server_timing(trace), f"total;dur={total:.3f}"]))
+    return response
+
+@app.teardown_request
+def drop_trace(exc):
+    # Worker threads are reused; never let a failed request's trace leak into the next one
+    end_trace()
+
+@app.errorhandler(400)
+def bad_request(error):
+    return jsonify({"error": error.description}), 400
 
 @app.route('/')
 def index():
@@ -19,15 +105,112 @@ def index():
 @app.route('/api/search', methods=['POST'])
 def search():
     data = request.json
-    user_items = data.get('items', [])
-    # Default user position (Varna Center) if browser GPS fails
-    user_pos = data.get('coords', "43.2047, 27.9100")
+    # Same basket in the same ~200 m cell -> same cached response
+    user_items = normalize_items(data.get('items', []))
+    # Default user position (Varna Center) if browser GPS fails; anything else becomes a string for the
+    # cache key (unparseable coords rank with the no-location distance penalty)
+    user_pos = snap_coords(str(data.get('coords', "43.2047, 27.9100")))
+    options = ranking_options(data)
     
-    # Run your ranking logic
-    results = get_store_rankings(engine, user_items, user_pos)
+    price_index, resolver = ranking_data()
+    key = (tuple(user_items), user_pos, tuple(options.values()))
+    with timer("search.cache"):
+        cached = search_cache.get(key, price_index.version)
+    if cached is None:
+        # Run your ranking logic
+        with timer("search.rank"):
+            results = get_store_rankings(engine, user_items, user_pos, price_index=price_index, resolver=resolver,
+                                         **options)
+        with timer("search.json"):
+            cached = search_cache.put(key, price_index.version, app.json.dumps(results).encode())
+    body, etag = cached
     
-    # Return results as JSON
-    return jsonify(results)
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'private, max-age={search_cache.ttl}'
+    return response
+
+@app.route('/api/basket', methods=['POST'])
+def basket():
+    """Incremental ranking: the client sends a token plus the items it added/removed.
+
+    'items' (the full list after the change) is only used to rebuild the basket when the
+    token is unknown or expired; otherwise only the add/remove deltas are applied.
+    """
+    data = request.json
+    user_pos = data.get('coords', "43.2047, 27.9100")
+    options = ranking_options(data)
+    price_index, resolver = ranking_data()
+
+    token = data.get('token')
+    state = basket_sessions.get(token)
+    if state is None or state.price_index is not price_index:
+        # New client, expired token, or a feed import since: re-price the list once
+        if 'items' in data:
+            names, deltas = data['items'], False
+        else:
+            names, deltas = (state.item_names() if state else []), True
+        # Only a token the server issued is reused; an unknown one gets a fresh token
+        if state is None:
+            token = None
+        state = BasketState(price_index, resolver)
+        for name in names:
+            state.add(name)
+        token = basket_sessions.put(state, token)
+    else:
+        deltas = True
+
+    with state.lock:
+        if deltas:
+            for name in data.get('remove', []):
+                state.remove(name)
+            for name in data.get('add', []):
+                state.add(name)
+        results = state.rank(user_pos, **options)
+        items = state.item_names()
+    return jsonify({"token": token, "items": items, "rankings": results})
+
+@app.route('/api/split', methods=['POST'])
+def split():
+    """Cheapest plans that split the basket across up to max_stops (default 2, at most 3) stores."""
+    data = request.json
+    user_pos = data.get('coords', "43.2047, 27.9100")
+    max_stops = min(number_param(data, 'max_stops', default=2), 3)
+    options = ranking_options(data)
+    price_index, resolver = ranking_data()
+    plans = get_split_plans(
+        engine, data.get('items', []), user_pos, max_stops=max_stops,
+        price_index=price_index, resolver=resolver, radius_km=options['radius_km'],
+        max_stores=options['max_stores'], top_n=number_param(data, 'top_n', default=5),
+    )
+    return jsonify(plans)
+
+@app.route('/api/trend', methods=['POST'])
+def trend():
+    data = request.json
+    _, resolver = ranking_data()
+    on_date = date_param(data, 'date', default=date.today())
+    # Price trend for one item at one store, or the cheapest stores for a basket on a given date
+    if 'items' in data:
+        cat_ids = [c for c in (resolver.resolve(parse_item_spec(i)[0]) for i in data['items']) if c is not None]
+        return jsonify(get_basket_prices_on(engine, cat_ids, on_date))
+    days = number_param(data, 'days', default=30)
+    cat_id = resolver.resolve(parse_item_spec(data.get('item', ''))[0])
+    if cat_id is None or 'store_id' not in data:
+        return jsonify([])
+    return jsonify(get_price_trend(engine, cat_id, number_param(data, 'store_id'), days, on_date))
+
+@app.route('/metrics')
+def metrics():
+    """Stage histograms and counters of this worker; Prometheus text, or JSON with ?format=json."""
+    if request.args.get('format') == 'json':
+        return jsonify(dict(REGISTRY.snapshot(), search_cache=search_cache.stats(),
+                            resolver=ranking_data()[1].stats(), basket_sessions=basket_sessions.stats()))
+    return app.response_class(REGISTRY.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # Development server; for production see gunicorn.conf.py
+    app.run(debug=True, threaded=True)
\ No newline at end of file
@@ -1,5 +1,6 @@
 let map, userMarker, routeLayer, storeMarkersLayer;
 let userLocation = { lat: 43.2047, lng: 27.9100 }; // Default: Varna Center
+let basketToken = null; // Server-side basket state, so each change only re-prices one item
 
 document.addEventListener('DOMContentLoaded', async () => {
     // 1. Get User Location
@@ -33,35 +34,47 @@ async function addToCart() {
 
     // Add to UI List
     const li = document.createElement('li');
-    li.innerHTML = `<span>${input.value} (x${qty})</span> <button onclick="this.parentElement.remove(); updateBackend();">X</button>`;
-    li.dataset.name = input.value;
+    li.innerHTML = `<span>${input.value} (x${qty})</span> <button onclick="removeFromCart(this.parentElement)">X</button>`;
+    // An explicit pack count: the server prices it as N of the store's single-pack choice
+    const item = qty > 1 ? { name: input.value, count: Number(qty) } : input.value;
+    li.dataset.item = JSON.stringify(item);
     document.getElementById('shopping-list').appendChild(li);
-    
+
     input.value = '';
-    updateBackend();
+    updateBackend({ add: [item] });
+}
+
+function removeFromCart(li) {
+    const item = JSON.parse(li.dataset.item);
+    li.remove();
+    updateBackend({ remove: [item] });
 }
 
-async function updateBackend() {
+async function updateBackend(change = {}) {
     const items = Array.from(document.querySelectorAll('#shopping-list li'))
-                       .map(li => li.dataset.name);
+                       .map(li => JSON.parse(li.dataset.item));
 
     if (items.length === 0) {
         clearCart();
         return;
     }
 
-    // Call your Flask API
-    const response = await fetch('/api/search', {
+    // Send only what changed; the full list lets the server rebuild an expired basket
+    const response = await fetch('/api/basket', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
+            token: basketToken,
+            add: change.add || [],
+            remove: change.remove || [],
             items: items,
             coords: `${userLocation.lat}, ${userLocation.lng}`
         })
     });
 
-    const rankings = await response.json();
-    displayRankings(rankings);
+    const result = await response.json();
+    basketToken = result.token;
+    displayRankings(result.rankings);
 }
 
 function displayRankings(rankings) {
@@ -117,6 +130,7 @@ async function planRoute(targetStore) {
 }
 
 function clearCart() {
+    basketToken = null;
     document.getElementById('shopping-list').innerHTML = '';
     document.getElementById('price-comparison').classList.add('hidden');
     document.getElementById('clear-btn').style.display = 'none';
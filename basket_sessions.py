@@ -0,0 +1,61 @@
+import time, secrets, threading
+from collections import OrderedDict
+
+class BasketSessions:
+    """In-memory BasketState per client token, evicted LRU-first or after ttl seconds idle.
+
+    Each state holds per-store arrays, so the total is capped by memory (max_bytes, from
+    the states' nbytes) as well as by count; any client can create sessions by omitting
+    its token.
+    """
+    def __init__(self, maxsize=10000, ttl=600, max_bytes=64 * 2**20):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._lock = threading.Lock()
+        self._states = OrderedDict()  # token -> (last_used, state), least recently used first
+
+    def _drop(self, token):
+        self.nbytes -= self._states.pop(token)[1].nbytes
+
+    def get(self, token):
+        if not token: return None
+        with self._lock:
+            entry = self._states.get(token)
+            if entry is None: return None
+            if entry[0] + self.ttl < time.monotonic():
+                self._drop(token)
+                return None
+            self._states[token] = (time.monotonic(), entry[1])
+            self._states.move_to_end(token)
+            return entry[1]
+
+    def put(self, state, token=None):
+        """Stores state under token (a new one if None) and returns the token.
+
+        Only pass a token that get() just returned; a client-chosen one would let
+        clients pick (and guess) each other's session keys.
+        """
+        token = token or secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            if token in self._states:
+                self._drop(token)
+            self._states[token] = (now, state)
+            self.nbytes += state.nbytes
+            # Expired sessions sit at the LRU end; then evict until within both limits
+            while self._states:
+                oldest, (last_used, _) = next(iter(self._states.items()))
+                if oldest == token or (last_used + self.ttl >= now and len(self._states) <= self.maxsize
+                                       and self.nbytes <= self.max_bytes):
+                    break
+                self._drop(oldest)
+        return token
+
+    def stats(self):
+        return {"sessions": len(self._states), "bytes": self.nbytes, "max_bytes": self.max_bytes,
+                "maxsize": self.maxsize, "ttl": self.ttl}
+
+    def __len__(self):
+        return len(self._states)
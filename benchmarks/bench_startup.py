@@ -0,0 +1,62 @@
+"""Cold-start time of a web worker: a fresh interpreter importing app.py.
+
+Each run is a separate subprocess against a scratch copy of the DB, migrated
+beforehand as a deploy would (cli.py migrate), so the numbers include Python
+startup, module imports, the schema check and the price index build, which is
+what a new gunicorn/flask worker pays.
+
+    python benchmarks/bench_startup.py --runs 10 --json startup.json
+"""
+import argparse, json, os, shutil, statistics, subprocess, sys, tempfile
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+
+from models import prepare_db
+
+PROBE = (
+    "import time, sys; t = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - t, int('requests' in sys.modules))"
+)
+
+def time_import(module, env, runs):
+    timings, loaded_requests = [], False
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE.format(module=module)], cwd=REPO, env=env,
+                             capture_output=True, text=True, check=True).stdout.split()
+        timings.append(float(out[0]) * 1000)
+        loaded_requests = loaded_requests or out[1] == "1"
+    return {
+        "module": module,
+        "runs": runs,
+        "median_ms": round(statistics.median(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "imports_requests": loaded_requests,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=os.path.join(REPO, "price_comparison.db"))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_copy = os.path.join(tmp, "price_comparison.db")
+        shutil.copy(args.db, db_copy)
+        # The app refuses an unmigrated DB; migrating is a deploy step, not part of startup
+        prepare_db(db_copy)
+        env = dict(os.environ, PRICE_DB=db_copy)
+        results = [time_import(m, env, args.runs) for m in ("ranking", "app")]
+
+    for r in results:
+        print(f"import {r['module']:<8} median {r['median_ms']:>8.1f} ms  min {r['min_ms']:>8.1f} ms  "
+              f"requests loaded: {r['imports_requests']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "startup", "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
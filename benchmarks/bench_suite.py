@@ -0,0 +1,188 @@
+"""Benchmark suite on a synthetic national-scale database.
+
+Builds a synthetic DB and feed ZIP (benchmarks/synthetic.py) in a scratch
+directory, then times parse_product, the price index build, get_store_rankings,
+process_feed (full and incremental import of the local ZIP, no network) and
+/api/search end to end through the Flask test client.
+
+    python benchmarks/bench_suite.py --json bench.json
+    python benchmarks/bench_suite.py --stores 300 --products-per-store 200 --json new.json --baseline bench.json
+
+With --baseline the medians are compared against an earlier --json file and the
+exit status is 1 if any benchmark got slower by more than --tolerance.
+"""
+import argparse, contextlib, io, json, os, platform, random, shutil, statistics, subprocess, sys, tempfile, time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+
+import synthetic
+from load_test import ITEMS, percentile
+
+def summarize(name, timings_ms, **extra):
+    timings_ms = sorted(timings_ms)
+    return dict({
+        "name": name,
+        "runs": len(timings_ms),
+        "median_ms": round(statistics.median(timings_ms), 3),
+        "p90_ms": round(percentile(timings_ms, 90), 3),
+        "p99_ms": round(percentile(timings_ms, 99), 3),
+        "min_ms": round(timings_ms[0], 3),
+    }, **extra)
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return (time.perf_counter() - started) * 1000, result
+def random_query(rng):
+    city, lat, lon, _ = rng.choices(synthetic.CITIES, [c[3] for c in synthetic.CITIES])[0]
+    coords = f"{lat + rng.uniform(-0.05, 0.05):.5f}, {lon + rng.uniform(-0.07, 0.07):.5f}"
+    return rng.sample(ITEMS, rng.randint(1, 8)), coords
+
+def bench_parse_product(names, runs):
+    from ingest import parse_product
+    timings = []
+    for _ in range(runs):
+        # Each run parses cold; the cache is what repeated names in a feed benefit from
+        parse_product.cache_clear()
+        ms, _ = timed(lambda: [parse_product(n) for n in names])
+        timings.append(ms)
+    return summarize("parse_product", timings, names=len(names),
+                     names_per_s=round(len(names) / (statistics.median(timings) / 1000)))
+def bench_rankings(db_path, queries, seed):
+    from sqlalchemy import create_engine
+    from ranking import PriceIndex, get_store_rankings, get_category_resolver
+    engine = create_engine(f"sqlite:///{db_path}")
+    build_ms, price_index = timed(PriceIndex.build, engine)
+    resolver = get_category_resolver(engine)
+    rng = random.Random(seed)
+    workload = [random_query(rng) for _ in range(queries)]
+    results = [summarize("price_index_build", [build_ms], stores=len(price_index.stores))]
+    for name, options in (("get_store_rankings", {}),
+                          ("get_store_rankings_top10_10km", {"top_k": 10, "radius_km": 10})):
+        timings = [timed(get_store_rankings, engine, items, coords, price_index=price_index, resolver=resolver,
+                         **options)[0] for items, coords in workload]
+        results.append(summarize(name, timings))
+    engine.dispose()
+    return results
+def bench_import(db_path, feed_path, incremental_feed_path, workdir, workers):
+    from sqlalchemy import create_engine, delete
+    from models import Product, PriceHistory
+    from ingest import process_feed
+    target = os.path.join(workdir, "import.db")
+    shutil.copy(db_path, target)
+    engine = create_engine(f"sqlite:///{target}")
+    with engine.begin() as conn:
+        conn.execute(delete(PriceHistory))
+        conn.execute(delete(Product))
+    results = []
+    for name, path, incremental in (("process_feed_full", feed_path, False),
+                                    ("process_feed_incremental", incremental_feed_path, True)):
+        # process_feed reports per file on stdout; keep the suite's own output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            ms, _ = timed(process_feed, path, engine, workers=workers, incremental=incremental)
+        results.append(summarize(name, [ms], workers=workers))
+    engine.dispose()
+    return results
+def bench_search(db_path, queries, seed):
+    # app.py opens PRICE_DB at import time and warms the index
+    os.environ["PRICE_DB"] = db_path
+    started = time.perf_counter()
+    import app as web
+    startup_ms = (time.perf_counter() - started) * 1000
+    client = web.app.test_client()
+    rng = random.Random(seed)
+    workload = [random_query(rng) for _ in range(queries)]
+
+    def post(items, coords):
+        resp = client.post("/api/search", json={"items": items, "coords": coords})
+        assert resp.status_code == 200, resp.status_code
+    web.search_cache.clear()
+    cold = [timed(post, *q)[0] for q in workload]
+    warm = [timed(post, *q)[0] for q in workload]
+    return [summarize("app_import", [startup_ms]),
+            summarize("api_search_uncached", cold),
+            summarize("api_search_cached", warm)]
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+def compare(report, baseline_path, tolerance):
+    """Benchmarks whose median grew by more than tolerance (a fraction) since baseline_path."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    if baseline.get("params") != report["params"]:
+        print("warning: baseline was run with different parameters, medians are not comparable")
+    before = {r["name"]: r for r in baseline["results"]}
+    regressions = []
+    for r in report["results"]:
+        old = before.get(r["name"])
+        if old and old["median_ms"] > 0 and r["median_ms"] > old["median_ms"] * (1 + tolerance):
+            regressions.append((r["name"], old["median_ms"], r["median_ms"]))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stores", type=int, default=3000)
+    parser.add_argument("--products-per-store", type=int, default=400)
+    parser.add_argument("--feed-rows-per-store", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--parse-names", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=1, help="process_feed workers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="keep the generated DB and feeds here instead of a temp dir")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="earlier --json output to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        db_path = os.path.join(workdir, "national.db")
+        setup = synthetic.build_db(db_path, args.stores, args.products_per_store, args.seed)
+        feed_path = os.path.join(workdir, "feed_2026-01-04.zip")
+        incremental_path = os.path.join(workdir, "feed_2026-01-05.zip")
+        setup["feed_rows"] = synthetic.write_feed(db_path, feed_path, args.feed_rows_per_store, args.seed + 1,
+                                                  price_change=0.0)["rows"]
+        synthetic.write_feed(db_path, incremental_path, args.feed_rows_per_store, args.seed + 2)
+        print(f"synthetic DB: {setup['stores']} stores, {setup['products']} products, "
+              f"feed {setup['feed_rows']} rows ({setup['seconds']}s)")
+
+        rng = random.Random(args.seed)
+        names = [raw for raw, _, _ in synthetic.product_pool([(1, "Прясно мляко 1 л"), (9, "Сирене 1 кг"),
+                                                              (31, "Яйца 6 бр.")], args.parse_names // 3, rng)]
+        results = [bench_parse_product(names, 5)]
+        results += bench_rankings(db_path, args.queries, args.seed)
+        results += bench_import(db_path, feed_path, incremental_path, workdir, args.workers)
+        results += bench_search(db_path, args.queries, args.seed)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    for r in results:
+        print(f"{r['name']:<32} median {r['median_ms']:>10.2f} ms  p90 {r['p90_ms']:>10.2f} ms  runs {r['runs']}")
+    report = {
+        "benchmark": "suite",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("json", "baseline", "tolerance", "workdir")},
+        "dataset": setup,
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.baseline:
+        regressions = compare(report, args.baseline, args.tolerance)
+        for name, old, new in regressions:
+            print(f"REGRESSION {name}: {old:.2f} ms -> {new:.2f} ms")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Load test for a running server: concurrent POST /api/search (or /api/basket) requests.
+
+    gunicorn -c gunicorn.conf.py app:app &
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --concurrency 16 --duration 20
+
+Reports requests/s and latency percentiles; --json writes them machine-readable.
+"""
+import argparse, json, random, statistics, threading, time, urllib.request
+
+ITEMS = ["хляб", "мляко", "масло", "захар", "сирене", "яйца", "ориз", "олио", "банани", "кафе",
+         "брашно", "домати", "картофи", "бира", "кашкавал", "леща", "боб", "сол"]
+VARNA = (43.2047, 27.9100)
+
+def random_payload(rng):
+    lat = VARNA[0] + rng.uniform(-0.04, 0.04)
+    lon = VARNA[1] + rng.uniform(-0.06, 0.06)
+    return {"items": rng.sample(ITEMS, rng.randint(1, 6)), "coords": f"{lat:.5f}, {lon:.5f}"}
+
+def percentile(sorted_values, p):
+    if not sorted_values: return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+def worker(url, deadline, seed, latencies, errors, lock):
+    rng = random.Random(seed)
+    local, failed = [], 0
+    while time.perf_counter() < deadline:
+        body = json.dumps(random_payload(rng)).encode()
+        req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                resp.read()
+            local.append((time.perf_counter() - started) * 1000)
+        except Exception:
+            failed += 1
+    with lock:
+        latencies.extend(local)
+        errors.append(failed)
+
+def run(url, concurrency, duration, seed=0):
+    latencies, errors, lock = [], [], threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=worker, args=(url, deadline, seed + i, latencies, errors, lock))
+               for i in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p90_ms": round(percentile(latencies, 90), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--endpoint", default="/api/search")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    result = run(args.url.rstrip("/") + args.endpoint, args.concurrency, args.duration)
+    print(f"{result['requests']} requests in {result['duration_s']}s ({result['errors']} errors): "
+          f"{result['rps']} req/s, p50 {result['p50_ms']} ms, p90 {result['p90_ms']} ms, p99 {result['p99_ms']} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "load", "results": [result]}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
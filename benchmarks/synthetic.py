@@ -0,0 +1,193 @@
+"""Synthetic national-scale price database and kolkostruva.bg-style feed ZIP.
+
+The database has the real schema (models.Base.metadata) and reference data
+(chains, chain names, units, categories); stores are spread around Bulgarian
+cities and products are drawn from a pool of feed-like names, so the sizes
+match a countrywide feed instead of the 23 Varna stores.
+
+    python benchmarks/synthetic.py --db /tmp/national.db --stores 3000 --products-per-store 400
+    python benchmarks/synthetic.py --db /tmp/national.db --feed /tmp/feed_2026-01-04.zip --feed-rows-per-store 50
+"""
+import argparse, csv, io, os, random, re, sys, time, zipfile
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from models import Base, Category, Chain, Store, Unit, Product, migrate
+from populate import stores as CHAIN_ALIASES, populate_chains, populate_chain_names, populate_units, populate_categories
+from ingest import parse_product
+
+# (name, lat, lon, weight): stores are placed around cities roughly by population
+CITIES = [
+    ("София", 42.6977, 23.3219, 30), ("Пловдив", 42.1354, 24.7453, 9), ("Варна", 43.2141, 27.9147, 9),
+    ("Бургас", 42.5048, 27.4626, 5), ("Русе", 43.8356, 25.9657, 4), ("Стара Загора", 42.4258, 25.6345, 4),
+    ("Плевен", 43.4170, 24.6067, 3), ("Сливен", 42.6817, 26.3229, 2), ("Добрич", 43.5726, 27.8273, 2),
+    ("Шумен", 43.2712, 26.9361, 2), ("Перник", 42.6052, 23.0378, 2), ("Хасково", 41.9344, 25.5554, 2),
+    ("Ямбол", 42.4842, 26.5035, 2), ("Пазарджик", 42.1928, 24.3336, 2), ("Благоевград", 42.0209, 23.0943, 2),
+    ("Велико Търново", 43.0757, 25.6172, 2), ("Враца", 43.2102, 23.5529, 1), ("Габрово", 42.8742, 25.3187, 1),
+    ("Видин", 43.9962, 22.8679, 1), ("Кърджали", 41.6338, 25.3777, 1), ("Монтана", 43.4125, 23.2250, 1),
+]
+STREETS = ["Христо Ботев", "Васил Левски", "Цар Освободител", "Република", "Сливница", "Мир", "Витоша",
+           "Александър Стамболийски", "Княз Борис I", "Шипка", "Гурко", "Раковски", "Оборище", "Независимост",
+           "Трети март", "Девети септември", "Освобождение", "Македония", "България", "Христо Смирненски",
+           "Дондуков", "Черни връх", "Симеоновско шосе", "Тракия", "Марица", "Дунав", "Опълченска", "Скопие"]
+BRANDS = ["Верея", "Олимпус", "Маджаров", "Тандем", "Бор Чвор", "Родея", "Престиж", "Деспред", "Калиакра",
+          "Екобелла", "Фамилекс", "Домашно", "Клас", "Меггле", "Бачо Илия", "Добруджа", "Хипп", "Нестле"]
+# Pack sizes by the unit a category is sold in
+SIZES = {
+    "KG": ["0.2кг", "0.25кг", "400г", "500гр", "0.7кг", "1кг", "2кг"],
+    "L": ["0.5л", "700мл", "1л", "1.5л", "2л"],
+    "бр": ["1бр", "6бр", "10бр", "1бр", "1бр"],
+}
+
+def category_unit(category_name):
+    """Unit a category is typically sold in, from the quantities in its description."""
+    name = category_name.lower()
+    if re.search(r'\d\s*(л|мл)\b', name):
+        return "L"
+    if re.search(r'\d\s*(кг|гр)', name):
+        return "KG"
+    return "бр"
+def category_stem(category_name):
+    """First words of a category description: "Прясно мляко от 2 % ..." -> "Прясно мляко"."""
+    stem = re.split(r'\s(?:от|\d)|,|\(', category_name, maxsplit=1)[0]
+    return stem.strip() or category_name
+
+def product_pool(categories, per_category, rng):
+    """Feed-style raw names per category: [(raw_name, category_id, base_price)]."""
+    pool = []
+    for cat_id, cat_name in categories:
+        unit = category_unit(cat_name)
+        stem = category_stem(cat_name)
+        base_price = rng.uniform(0.8, 18.0)
+        for _ in range(per_category):
+            raw = f"{stem} {rng.choice(BRANDS)} {rng.randint(1, 99)} {rng.choice(SIZES[unit])}"
+            pool.append((raw, cat_id, base_price * rng.uniform(0.7, 1.4)))
+    return pool
+def store_rows(chain_ids, n_stores, rng):
+    """n_stores unique (chain_id, city, address, lat, lon) tuples around CITIES."""
+    weights = [c[3] for c in CITIES]
+    seen, rows = set(), []
+    while len(rows) < n_stores:
+        chain_id = rng.choice(chain_ids)
+        city, lat, lon, _ = rng.choices(CITIES, weights)[0]
+        address = f"ул. „{rng.choice(STREETS)}“ {rng.randint(1, 400)}"
+        if (chain_id, city, address) in seen:
+            continue
+        seen.add((chain_id, city, address))
+        rows.append((chain_id, city, address, round(lat + rng.gauss(0, 0.03), 6), round(lon + rng.gauss(0, 0.04), 6)))
+    return rows
+
+def build_db(db_path, n_stores=3000, products_per_store=400, seed=0, names_per_category=60, batch_size=50000):
+    """Creates db_path (replacing it) and fills it; returns counts and timings."""
+    rng = random.Random(seed)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    started = time.perf_counter()
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    populate_chains(engine, CHAIN_ALIASES)
+    populate_chain_names(engine, CHAIN_ALIASES)
+    populate_units(engine)
+    populate_categories(engine)
+    with Session(engine) as session:
+        chain_ids = sorted(session.execute(select(Chain.id)).scalars())
+        categories = [(c.id, c.name) for c in session.execute(select(Category).order_by(Category.id)).scalars()]
+        units_map = {u.name: u.id for u in session.execute(select(Unit)).scalars()}
+
+    with engine.begin() as conn:
+        conn.execute(insert(Store), [
+            {"chain_id": c, "populated_area": city, "address": address, "lat": lat, "lon": lon, "coords": f"{lat}, {lon}"}
+            for c, city, address, lat, lon in store_rows(chain_ids, n_stores, rng)
+        ])
+        store_ids = list(conn.execute(select(Store.id).order_by(Store.id)).scalars())
+
+    # parse_product once per distinct name; stores then sample from the parsed pool
+    pool = [(parse_product(raw), cat_id, price) for raw, cat_id, price in
+            product_pool(categories, names_per_category, rng)]
+    n_products = 0
+    with engine.begin() as conn:
+        conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        batch = []
+        for store_id in store_ids:
+            store_factor = rng.uniform(0.9, 1.1)
+            for (name, qty, unit), cat_id, price in rng.sample(pool, min(products_per_store, len(pool))):
+                batch.append({
+                    "name": name, "quantity": qty, "price": round(price * store_factor * rng.uniform(0.95, 1.05), 2),
+                    "category_id": cat_id, "store_id": store_id, "unit_id": units_map.get(unit),
+                })
+                if len(batch) >= batch_size:
+                    conn.execute(insert(Product), batch)
+                    n_products += len(batch)
+                    batch = []
+        if batch:
+            conn.execute(insert(Product), batch)
+            n_products += len(batch)
+    engine.dispose()
+    # Indexes, ANALYZE and the tables added since the original schema
+    migrate(engine)
+    return {"stores": len(store_ids), "products": n_products, "seconds": round(time.perf_counter() - started, 2)}
+
+def write_feed(db_path, zip_path, rows_per_store=50, seed=1, price_change=0.1, max_stores=None):
+    """Writes a feed ZIP (one "<chain>_<date>.csv" per chain) for the stores in db_path.
+
+    Rows reuse product names already in the DB, so an incremental import of the feed
+    finds them; price_change is the share of rows whose price differs from the DB.
+    """
+    rng = random.Random(seed)
+    engine = create_engine(f"sqlite:///{db_path}")
+    with Session(engine) as session:
+        chain_names = {c.id: c.name for c in session.execute(select(Chain)).scalars()}
+        store_list = session.execute(select(Store.id, Store.chain_id, Store.populated_area, Store.address)
+                                     .order_by(Store.id)).all()
+    if max_stores is not None:
+        store_list = store_list[:max_stores]
+    feed_date = re.search(r'(\d{4}-\d{2}-\d{2})', os.path.basename(zip_path))
+    suffix = feed_date.group(1) if feed_date else "2026-01-04"
+    files = {}
+    n_rows = 0
+    with engine.connect() as conn:
+        for store_id, chain_id, city, address in store_list:
+            products = conn.execute(
+                select(Product.name, Product.quantity, Product.price, Product.category_id, Unit.name)
+                .outerjoin(Unit, Unit.id == Product.unit_id)
+                .where(Product.store_id == store_id).limit(rows_per_store)
+            ).all()
+            writer = files.setdefault(chain_id, io.StringIO())
+            if writer.tell() == 0:
+                csv.writer(writer).writerow(["Населено място", "Търговски обект", "Наименование на продукта",
+                                             "Код на продукта", "Категория", "Цена на дребно", "Цена в промоция"])
+            out = csv.writer(writer)
+            for name, qty, price, cat_id, unit in products:
+                if rng.random() < price_change:
+                    price = round(price * rng.uniform(0.8, 1.2), 2)
+                size = f" {qty:g}{unit.lower() if unit in ('KG', 'L') else unit}" if qty else ""
+                out.writerow([city, f"{chain_names[chain_id]} {address}", f"{name}{size}", 1, cat_id,
+                              f"{price:.2f}".replace('.', ','), ""])
+                n_rows += 1
+    engine.dispose()
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as z:
+        for chain_id, buf in files.items():
+            z.writestr(f"{chain_names[chain_id].lower()}_{suffix}.csv", "﻿" + buf.getvalue())
+    return {"rows": n_rows, "files": len(files)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--stores", type=int, default=3000)
+    parser.add_argument("--products-per-store", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--feed", help="also write a feed ZIP for the generated stores")
+    parser.add_argument("--feed-rows-per-store", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    print(build_db(args.db, args.stores, args.products_per_store, args.seed))
+    if args.feed:
+        print(write_feed(args.db, args.feed, args.feed_rows_per_store, args.seed + 1))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse, os, sys
+from sqlalchemy import create_engine
+
+DEFAULT_DB = "price_comparison.db"
+DEFAULT_FEED_URL = 'https://kolkostruva.bg/opendata_files/2026-01-04.zip'
+DEFAULT_COORDS = "43.2047, 27.9100"
+DEFAULT_LIST = ["хляб", "мляко", "масло", "захар"]
+
+def print_store_rankings(rankings):
+    """
+    UI Logic: Prints a scannable table followed by a detailed breakdown 
+    of the items chosen for each store.
+    """
+    if not rankings:
+        print("\n[!] No stores found with the requested products.")
+        return
+
+    print(f"\n{'='*25} TOP STORES IN VARNA {'='*25}")
+    # Main Table Header
+    header = f"{'RANK':<5} | {'STORE':<40} | {'PRICE':<10} | {'DIST':<8} | {'MISSING'}"
+    print(header)
+    print("-" * len(header))
+    
+    for i, r in enumerate(rankings):
+        rank_label = f"#{i+1}"
+        full_name = f"{r['chain_name']} ({r['address']})"
+        
+        price_str = f"{r['real_price']:>6.2f} лв" if r['real_price'] > 0 else "  --    "
+        dist_str = f"{r['distance_km']:>5.2f} km"
+        
+        # 1. Print Main Row
+        print(f"{rank_label:<5} | {full_name[:38]:<40} | {price_str:<10} | {dist_str:<8} | {r['missing_count']} items")
+        
+        # 2. Print Detailed Breakdown (Sub-items)
+        if r.get("chosen_items"):
+            for item in r["chosen_items"]:
+                # Indented receipt-style lines
+                item_line = f"      > {item['requested_as'].capitalize()}: {item['name'][:30]} ... {item['price']:.2f} лв"
+                print(item_line)
+        
+        # 3. Print Coordinates (Sub-line)
+        if r.get("coords"):
+            print(f"      @ Coords: {r['coords']}")
+        
+        print("-" * len(header)) # Separator between stores
+    
+    print(f"Sorted by: Price + Travel Friction + Dynamic Penalty\n")
+def cmd_init(args):
+    """Rebuilds the DB from scratch: reference data, Varna stores and one feed."""
+    from populate import (stores, create_db, populate_chains, populate_chain_names, populate_units,
+                          populate_categories, populate_varna_stores)
+    from ingest import process_feed
+    if os.path.exists(args.db): os.remove(args.db)
+    engine = create_db(args.db)
+    populate_chains(engine, stores)
+    populate_chain_names(engine, stores)
+    populate_units(engine)
+    populate_categories(engine)
+    populate_varna_stores(engine)
+    process_feed(args.url, engine, workers=args.workers, persist_aliases=args.persist_aliases)
+    if args.snapshot:
+        write_snapshot_file(engine, args.snapshot)
+def cmd_import(args):
+    from ingest import process_feed, FEED_URL_TEMPLATE
+    engine = create_engine(f"sqlite:///{args.db}")
+    url = args.source or FEED_URL_TEMPLATE.format(date=args.date)
+    process_feed(url, engine, workers=args.workers, persist_aliases=args.persist_aliases,
+                 incremental=args.incremental, feed_date=args.date)
+    if args.snapshot:
+        write_snapshot_file(engine, args.snapshot)
+def cmd_rank(args):
+    from ranking import get_store_rankings
+    engine = create_engine(f"sqlite:///{args.db}")
+    results = get_store_rankings(engine, args.items or DEFAULT_LIST, args.coords,
+                                 top_k=args.top_k, radius_km=args.radius_km, max_stores=args.max_stores)
+    print_store_rankings(results)
+def cmd_split(args):
+    from optimizer import get_split_plans
+    engine = create_engine(f"sqlite:///{args.db}")
+    plans = get_split_plans(engine, args.items or DEFAULT_LIST, args.coords, max_stops=args.max_stops,
+                            radius_km=args.radius_km, top_n=args.top_n)
+    for i, plan in enumerate(plans):
+        print(f"#{i+1}  {plan['real_price']:.2f} лв + {plan['distance_km']:.2f} km, {plan['missing_count']} missing")
+        for stop in plan["stores"]:
+            print(f"      {stop['chain_name']} ({stop['address']}): {stop['subtotal']:.2f} лв")
+            for item in stop["chosen_items"]:
+                print(f"        > {item['requested_as'].capitalize()}: {item['name'][:30]} ... {item['price']:.2f} лв")
+def cmd_geocode(args):
+    """Fills in missing store coordinates, through geocode_cache."""
+    from models import migrate
+    from geocode import geocode_stores, GazetteerBackend, PhotonBackend
+    engine = create_engine(f"sqlite:///{args.db}")
+    migrate(engine)
+    backend = GazetteerBackend.from_csv(args.gazetteer) if args.gazetteer else PhotonBackend()
+    n = geocode_stores(engine, backend, only_missing=not args.all, workers=args.workers, rate=args.rate)
+    print(f"Geocoded {n} stores ({backend.name}).")
+def write_snapshot_file(engine, path):
+    from snapshot import write_snapshot
+    size = write_snapshot(engine, path)
+    print(f"Wrote snapshot {path} ({size / 1e6:.1f} MB).")
+def cmd_snapshot(args):
+    """Writes the memory-mapped ranking snapshot the web app loads with PRICE_SNAPSHOT."""
+    write_snapshot_file(create_engine(f"sqlite:///{args.db}"), args.out)
+def cmd_dump(args):
+    from populate import show_all_data
+    show_all_data(create_engine(f"sqlite:///{args.db}"))
+def cmd_migrate(args):
+    from models import prepare_db, check_query_plans
+    actions = prepare_db(args.db)
+    engine = create_engine(f"sqlite:///{args.db}")
+    for action in actions:
+        print(f"  {action}")
+    print(f"Applied {len(actions)} schema changes.")
+    problems = check_query_plans(engine)
+    for name, plan in problems.items():
+        print(f"[!] {name} does not use an index: {plan}")
+    return 1 if problems else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Price comparison DB tools")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite database file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("init", help="delete and rebuild the DB, then import a feed")
+    p.add_argument("--url", default=DEFAULT_FEED_URL)
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--persist-aliases", action="store_true")
+    p.add_argument("--snapshot", help="write the ranking snapshot here after the import")
+    p.set_defaults(func=cmd_init)
+
+    p = sub.add_parser("import", help="import a feed into the existing DB")
+    p.add_argument("source", nargs="?", help="feed URL or local ZIP path")
+    p.add_argument("--date", help="feed date YYYY-MM-DD (builds the kolkostruva.bg URL if no source)")
+    p.add_argument("--incremental", action="store_true")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--persist-aliases", action="store_true")
+    p.add_argument("--snapshot", help="write the ranking snapshot here after the import")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("rank", help="rank stores for a shopping list")
+    p.add_argument("items", nargs="*")
+    p.add_argument("--coords", default=DEFAULT_COORDS)
+    p.add_argument("--top-k", type=int)
+    p.add_argument("--radius-km", type=float)
+    p.add_argument("--max-stores", type=int)
+    p.set_defaults(func=cmd_rank)
+
+    p = sub.add_parser("split", help="cheapest plans across several stores")
+    p.add_argument("items", nargs="*")
+    p.add_argument("--coords", default=DEFAULT_COORDS)
+    p.add_argument("--max-stops", type=int, default=2)
+    p.add_argument("--radius-km", type=float)
+    p.add_argument("--top-n", type=int, default=5)
+    p.set_defaults(func=cmd_split)
+
+    p = sub.add_parser("geocode", help="fill in store coordinates (cached in geocode_cache)")
+    p.add_argument("--gazetteer", help="offline CSV with address, lat, lon columns instead of photon")
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--rate", type=float, help="max lookups per second (backend default if unset)")
+    p.add_argument("--all", action="store_true", help="also re-geocode stores that already have coordinates")
+    p.set_defaults(func=cmd_geocode)
+
+    p = sub.add_parser("snapshot", help="write the ranking snapshot for the web app (PRICE_SNAPSHOT)")
+    p.add_argument("--out", default="price_snapshot.bin")
+    p.set_defaults(func=cmd_snapshot)
+
+    p = sub.add_parser("dump", help="print every table")
+    p.set_defaults(func=cmd_dump)
+
+    p = sub.add_parser("migrate", help="deploy step: add missing tables/columns/indexes, enable WAL, check query plans")
+    p.set_defaults(func=cmd_migrate)
+
+    args = parser.parse_args(argv)
+    if args.command == "import" and not (args.source or args.date):
+        parser.error("import needs a source or --date")
+    return args.func(args) or 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Store address geocoding: a persistent cache (geocode_cache), batched lookups and pluggable backends.
+
+A backend is any object with a `name` and a `lookup(query) -> (lat, lon) or None`;
+it raises on transient failures (network, HTTP errors), which are not cached.
+`rate` (lookups per second) defaults to the backend's `rate` attribute.
+"""
+import csv, re, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import select, insert, update, bindparam
+from sqlalchemy.orm import Session
+from models import GeocodeCache, Store
+from ingest import normalize_address
+from metrics import count
+
+def geocode_query(address):
+    """Cleans a feed/store address into a geocoder query (drops chain names, postcodes, "X - Y" prefixes)."""
+    if not address: return ""
+    address = address.replace("rp.", "гр.").strip(' "')
+    if '/' in address and ' - ' in address:
+        address = address.split(' - ')[-1].replace('/', ', ')
+    elif ' - ' in address:
+        address = address.split(' - ')[-1]
+    address = re.sub(r'^(Билла|Метро|Kaufland|Кауфланд|BulMag|Булмаг)\s+\d*\s*', '', address, flags=re.I)
+    address = re.sub(r'\b\d{4}\b', '', address)
+    return re.sub(r'^[\s\-\,]+', '', address).strip()
+
+class PhotonBackend:
+    """photon.komoot.io (OpenStreetMap); the public instance asks for at most ~2 requests/s."""
+    name = "photon"
+    rate = 2.0
+
+    def __init__(self, url="https://photon.komoot.io/api/", timeout=5, country="Bulgaria"):
+        self.url = url
+        self.timeout = timeout
+        self.country = country
+
+    def lookup(self, query):
+        # Ingest-only dependency: imported here so the web app never loads it
+        import requests
+        r = requests.get(self.url, params={"q": f"{query}, {self.country}", "limit": 1},
+                         headers={"User-Agent": "Mozilla/5.0"}, timeout=self.timeout)
+        r.raise_for_status()
+        features = r.json().get('features')
+        if not features:
+            return None
+        lon, lat = features[0]['geometry']['coordinates']
+        return float(lat), float(lon)
+
+class GazetteerBackend:
+    """Offline lookups from known addresses, e.g. a CSV with address, lat, lon columns."""
+    name = "gazetteer"
+    rate = None
+
+    def __init__(self, entries):
+        # entries: {address: (lat, lon)}, matched on the same normalization as queries
+        self.entries = {normalize_address(geocode_query(a)): (float(lat), float(lon)) for a, (lat, lon) in entries.items()}
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            return cls({row['address']: (row['lat'], row['lon']) for row in csv.DictReader(f)})
+
+    def lookup(self, query):
+        return self.entries.get(normalize_address(query))
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads."""
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def load_cached(engine, keys):
+    """{address_key: (lat, lon) or None} for the keys already in geocode_cache."""
+    found, keys = {}, list(keys)
+    with Session(engine) as session:
+        for i in range(0, len(keys), 500):
+            rows = session.execute(
+                select(GeocodeCache.address_key, GeocodeCache.lat, GeocodeCache.lon)
+                .where(GeocodeCache.address_key.in_(keys[i:i + 500]))
+            )
+            for key, lat, lon in rows:
+                found[key] = (lat, lon) if lat is not None and lon is not None else None
+    return found
+def geocode_many(addresses, engine=None, backend=None, workers=4, rate=None):
+    """Geocodes addresses -> {address: (lat, lon) or None}.
+
+    Addresses are deduplicated by normalize_address(). With an engine, answers (including
+    "not found") are read from and saved to geocode_cache, so each address reaches the
+    backend once. Misses are looked up on `workers` threads, at most `rate` per second.
+    Lookups that raise are logged and left uncached, to be retried next time.
+    """
+    backend = backend or PhotonBackend()
+    keys = {}
+    for address in addresses:
+        query = geocode_query(address)
+        if query:
+            keys.setdefault(normalize_address(query), query)
+    results = load_cached(engine, keys) if engine is not None else {}
+    count("geocode.cache_hits", len(results))
+    missing = [(key, query) for key, query in keys.items() if key not in results]
+    limiter = RateLimiter(rate if rate is not None else backend.rate)
+
+    def lookup(item):
+        key, query = item
+        limiter.wait()
+        try:
+            return key, query, backend.lookup(query), None
+        except Exception as e:
+            return key, query, None, e
+
+    new_rows, errors = [], 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for key, query, position, error in pool.map(lookup, missing):
+            if error is not None:
+                errors += 1
+                print(f"[!] geocoding {query!r} failed: {error}")
+                continue
+            results[key] = position
+            new_rows.append({
+                "address_key": key, "query": query, "source": backend.name,
+                "lat": position[0] if position else None, "lon": position[1] if position else None,
+                "fetched_at": datetime.now().isoformat(timespec="seconds"),
+            })
+    count("geocode.lookups", len(missing))
+    count("geocode.errors", errors)
+    if engine is not None and new_rows:
+        GeocodeCache.__table__.create(engine, checkfirst=True)
+        with engine.begin() as conn:
+            conn.execute(insert(GeocodeCache).prefix_with("OR REPLACE"), new_rows)
+    return {a: results.get(normalize_address(geocode_query(a))) for a in addresses}
+def geocode_stores(engine, backend=None, only_missing=True, **kwargs):
+    """Fills stores.lat/lon (and the coords string) through geocode_many; returns how many stores got a position."""
+    with Session(engine) as session:
+        stmt = select(Store.id, Store.address, Store.populated_area)
+        if only_missing:
+            stmt = stmt.where(Store.lat.is_(None))
+        stores = session.execute(stmt).all()
+    queries = {store_id: ", ".join(p for p in (address, area) if p) for store_id, address, area in stores}
+    positions = geocode_many(list(queries.values()), engine, backend, **kwargs)
+    updates = [
+        {"b_id": store_id, "b_lat": positions[q][0], "b_lon": positions[q][1],
+         "b_coords": f"{positions[q][0]}, {positions[q][1]}"}
+        for store_id, q in queries.items() if positions.get(q)
+    ]
+    if updates:
+        with engine.begin() as conn:
+            conn.execute(update(Store).where(Store.id == bindparam("b_id"))
+                         .values(lat=bindparam("b_lat"), lon=bindparam("b_lon"), coords=bindparam("b_coords")), updates)
+    return len(updates)
@@ -0,0 +1,19 @@
+# Production serving: gunicorn -c gunicorn.conf.py app:app
+# Several processes with a few threads each. Ranking is CPU-bound NumPy/rapidfuzz work,
+# so extra processes give parallelism and threads cover the I/O-bound parts.
+import multiprocessing, os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.environ.get("WEB_THREADS", 4))
+worker_class = "gthread"
+timeout = 30
+
+# Import app.py once in the master: the schema check and price index build happen once and
+# the index pages are shared copy-on-write by every forked worker. Run `cli.py migrate` first.
+preload_app = True
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with forked workers
+    import app
+    app.engine.dispose(close=False)
@@ -0,0 +1,107 @@
+from datetime import date
+from sqlalchemy import select, insert, literal, func, and_, union_all
+from sqlalchemy.orm import Session
+from models import Product, PriceHistory, encode_day, decode_day
+
+# price history
+def seed_price_history(conn, day):
+    """Records the current price of every product that has no price_history row yet, as of day.
+
+    Products imported before price_history existed (or by a non-recording import) would
+    otherwise never show up in trends or as-of lookups until their price changed.
+    Returns the number of rows written.
+    """
+    columns = [PriceHistory.product_id, PriceHistory.store_id, PriceHistory.category_id, PriceHistory.day,
+               PriceHistory.price]
+    # NOT IN (subquery) is one pass over price_history, not a lookup per product
+    missing = select(Product.id, Product.store_id, Product.category_id, literal(day), Product.price).where(
+        Product.id.not_in(select(PriceHistory.product_id)))
+    return conn.execute(insert(PriceHistory).from_select(columns, missing)).rowcount
+def get_price_trend(engine, category_id, store_id, days=30, end_date=None):
+    """Cheapest and average unit price in a category at one store for each day with a change.
+
+    Reads the (store, category) slice of price_history through its covering index: the
+    latest row of each product as of the window start, plus the changes inside the window.
+    """
+    end_day = encode_day(end_date or date.today())
+    start_day = end_day - days
+    in_slice = (PriceHistory.store_id == store_id, PriceHistory.category_id == category_id)
+    as_of_start = select(PriceHistory.product_id, func.max(PriceHistory.day).label("day")).where(
+        *in_slice, PriceHistory.day <= start_day).group_by(PriceHistory.product_id).subquery()
+    history = union_all(
+        select(PriceHistory.day, PriceHistory.id, PriceHistory.product_id, PriceHistory.price)
+        .join(as_of_start, and_(*in_slice, PriceHistory.day == as_of_start.c.day,
+                                PriceHistory.product_id == as_of_start.c.product_id)),
+        select(PriceHistory.day, PriceHistory.id, PriceHistory.product_id, PriceHistory.price)
+        .where(*in_slice, PriceHistory.day > start_day, PriceHistory.day <= end_day),
+    ).subquery()
+    with Session(engine) as session:
+        rows = session.execute(
+            select(history.c.day, history.c.product_id, history.c.price, Product.quantity)
+            .join(Product, Product.id == history.c.product_id)
+            .order_by(history.c.day, history.c.id)
+        ).all()
+
+    current = {}
+    trend = []
+    def emit(day):
+        if not current: return
+        unit_prices = current.values()
+        trend.append({
+            "date": decode_day(max(day, start_day)),
+            "min_unit_price": round(min(unit_prices), 2),
+            "avg_unit_price": round(sum(unit_prices) / len(unit_prices), 2),
+            "products": len(current),
+        })
+    last_day = None
+    for day, product_id, price, qty in rows:
+        # Changes before the window only build up the starting state
+        if last_day is not None and day != last_day and day > start_day:
+            emit(last_day)
+        current[product_id] = (price / qty) if (qty and qty > 0) else price
+        last_day = day
+    if last_day is not None:
+        emit(last_day)
+    return trend
+def get_basket_prices_on(engine, category_ids, on_date):
+    """Cheapest basket per store as of on_date, from the latest price_history entry of each product.
+
+    Returns [{"store_id", "real_price", "found", "missing"}] sorted by price, stores with the
+    most categories found first.
+    """
+    day = encode_day(on_date)
+    category_ids = list(dict.fromkeys(category_ids))
+    # Latest day of each product; joined back on the whole index prefix to fetch that row only
+    as_of = select(PriceHistory.category_id, PriceHistory.store_id, PriceHistory.product_id,
+                   func.max(PriceHistory.day).label("day")).where(
+        PriceHistory.category_id.in_(category_ids), PriceHistory.day <= day,
+    ).group_by(PriceHistory.product_id, PriceHistory.category_id, PriceHistory.store_id).subquery()
+    with Session(engine) as session:
+        rows = session.execute(
+            select(PriceHistory.product_id, PriceHistory.store_id, PriceHistory.category_id, PriceHistory.price, Product.quantity)
+            .join(as_of, and_(PriceHistory.category_id == as_of.c.category_id, PriceHistory.day == as_of.c.day,
+                              PriceHistory.store_id == as_of.c.store_id, PriceHistory.product_id == as_of.c.product_id))
+            .join(Product, Product.id == PriceHistory.product_id)
+            .order_by(PriceHistory.day, PriceHistory.id)
+        ).all()
+
+    latest = {}
+    for product_id, store_id, cat_id, price, qty in rows:
+        latest[product_id] = (store_id, cat_id, price, (price / qty) if (qty and qty > 0) else price)
+    cheapest = {}
+    for store_id, cat_id, price, unit_price in latest.values():
+        key = (store_id, cat_id)
+        if key not in cheapest or unit_price < cheapest[key][1]:
+            cheapest[key] = (price, unit_price)
+
+    baskets = {}
+    for (store_id, cat_id), (price, _) in cheapest.items():
+        basket = baskets.setdefault(store_id, {"store_id": store_id, "real_price": 0.0, "found": 0})
+        basket["real_price"] += price
+        basket["found"] += 1
+    results = []
+    for basket in baskets.values():
+        basket["real_price"] = round(basket["real_price"], 2)
+        basket["missing"] = len(category_ids) - basket["found"]
+        results.append(basket)
+    return sorted(results, key=lambda b: (b["missing"], b["real_price"]))
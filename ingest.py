@@ -0,0 +1,395 @@
+import zipfile, io, os, csv, re, time, tempfile, contextlib, functools
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date
+from sqlalchemy import select, insert, update, bindparam
+from sqlalchemy.orm import Session
+from rapidfuzz import process, fuzz
+from models import Chain, Store, ChainName, Unit, Product, StoreAlias, FeedImport, PriceHistory, encode_day
+from ranking import rebuild_price_index
+from summary import refresh_price_summary
+from history import seed_price_history
+from units import UNIT_CONVERSIONS
+from metrics import timer, observe, count
+
+# parsing data
+def get_coords(address, engine=None, backend=None):
+    """'lat, lon' for a store address, or None. See geocode.geocode_many for caching and backends."""
+    from geocode import geocode_many
+    position = geocode_many([address], engine, backend).get(address)
+    return f"{position[0]}, {position[1]}" if position else None
+_UNIT = r'(КГ|ГР|Г|МЛ|Л|БР|KG|GR|G|ML|L|MЛ|КG|KГ|M)'
+# One scan finds the first range ("400/500г"), multi-pack ("4x125г") and standard ("1.5л") size;
+# they take priority in that order, like the three separate searches they replace
+PRODUCT_SIZE_PATTERN = re.compile(
+    # The lookahead lets the scan skip non-digit positions without trying each alternative
+    r'(?=\d)(?:(?P<range>(\d+)/(\d+)\s*' + _UNIT + r')'
+    r'|(?P<multi>(\d+)\s*[xхXХ]\s*(\d+[\.,]?\d*)\s*' + _UNIT + r')'
+    r'|(?P<std>(\d+[\.,]?\d*)\s*' + _UNIT + r'\b))',
+    re.I,
+)
+_NAME_TRIM_PATTERN = re.compile(r'^[\s\.\-\,]+|[\s\.\-\,]+$')
+@functools.lru_cache(maxsize=65536)
+def parse_product(product_string):
+    """Product name from a feed -> (name without the size, quantity in KG / L / бр, unit)."""
+    product_string = product_string.replace('~', '').strip()
+    first = {}
+    # Nothing outranks a range, or a multi-pack when there's no "/" for a range later on
+    stop_at = ('range', 'multi') if '/' not in product_string else ('range',)
+    for m in PRODUCT_SIZE_PATTERN.finditer(product_string):
+        first.setdefault(m.lastgroup, m)
+        if m.lastgroup in stop_at:
+            break
+    if 'range' in first:
+        m = first['range']
+        quantity = (float(m.group(2)) + float(m.group(3))) / 2
+        raw_unit = m.group(4)
+    elif 'multi' in first:
+        m = first['multi']
+        quantity = float(m.group(6)) * float(m.group(7).replace(',', '.'))
+        raw_unit = m.group(8)
+    elif 'std' in first:
+        m = first['std']
+        quantity = float(m.group(10).replace(',', '.'))
+        raw_unit = m.group(11)
+    else:
+        return product_string, 1.0, 'бр'
+    unit = 'бр'
+    conversion = UNIT_CONVERSIONS.get(raw_unit.upper())
+    if conversion:
+        unit, multiplier = conversion
+        quantity = round(quantity * multiplier, 3)
+    if quantity <= 0.001:
+        quantity = 1.0; unit = 'бр'
+    clean_name = _NAME_TRIM_PATTERN.sub('', product_string.replace(m.group(0), "").strip())
+    return clean_name, quantity, unit
+def parse_products(product_strings):
+    """parse_product over a whole column (e.g. every product name of a feed CSV), parsing each distinct name once."""
+    parsed = {s: parse_product(s) for s in set(product_strings)}
+    return [parsed[s] for s in product_strings]
+def normalize_address(addr):
+    if not addr: return ""
+    addr = addr.lower()
+    for char in ['„', '“', '"', '(', ')', ' - ет. -2', ', grand mall, ет. -2', ', uptown ниво 1']:
+        addr = addr.replace(char, '')
+    for prefix in ['ул.', 'бул.', 'гр.', 'к.к.', 'адрес:', 'bulmag', 'булмаг']:
+        addr = addr.replace(prefix, '')
+    return " ".join(addr.split())
+FEED_BATCH_SIZE = 5000
+# Applied on the loader's connection only: WAL lets readers keep serving during an import
+LOAD_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+]
+def download_feed(url, dest_dir=None):
+    """Streams the feed archive to a temporary file and returns its path."""
+    import requests
+    fd, path = tempfile.mkstemp(suffix=".zip", dir=dest_dir)
+    try:
+        with os.fdopen(fd, "wb") as out, requests.get(url, stream=True, timeout=60) as resp:
+            resp.raise_for_status()
+            for chunk in resp.iter_content(chunk_size=1 << 20):
+                out.write(chunk)
+    except:
+        os.remove(path)
+        raise
+    return path
+def clean_price(value):
+    return float(str(value).replace(',', '.')) if value else 0.0
+def iter_feed_rows(zip_path, filename, store_candidates, units_map, alias_cache=None, stats=None):
+    """Parses one chain's CSV from the feed archive, yielding product rows matched to a store.
+
+    store_candidates is a list of (store_id, normalized_address) for the file's chain.
+    alias_cache maps raw "Търговски обект" strings to a store_id (or None for no match)
+    and is filled in as rows are read, so each distinct address is fuzzy-matched once.
+    stats counts rows that were fuzzy "matched", served from the alias cache ("cached"),
+    or "rejected" because no store matched.
+    """
+    if alias_cache is None: alias_cache = {}
+    if stats is None: stats = {}
+    for k in ("matched", "cached", "rejected", "fuzzy_calls"):
+        stats.setdefault(k, 0)
+    store_ids = [c[0] for c in store_candidates]
+    db_addresses_only = [c[1] for c in store_candidates]
+    with zipfile.ZipFile(zip_path) as z, z.open(filename) as f:
+        reader = csv.DictReader(io.TextIOWrapper(f, encoding='utf-8-sig'))
+        for row in reader:
+            csv_addr_raw = row.get("Търговски обект", "").strip()
+            if csv_addr_raw in alias_cache:
+                target_store_id = alias_cache[csv_addr_raw]
+                if target_store_id: stats["cached"] += 1
+            else:
+                csv_addr_clean = normalize_address(csv_addr_raw)
+                match = process.extractOne(csv_addr_clean, db_addresses_only, scorer=fuzz.token_set_ratio)
+                stats["fuzzy_calls"] += 1
+                target_store_id = store_ids[match[2]] if (match and match[1] > 80) else None
+                alias_cache[csv_addr_raw] = target_store_id
+                if target_store_id: stats["matched"] += 1
+            if not target_store_id:
+                stats["rejected"] += 1
+                continue
+
+            prod_raw = row.get("Наименование на продукта", "").strip()
+            if not prod_raw: continue
+            p_name, p_qty, p_unit_str = parse_product(prod_raw)
+
+            try:
+                p_promo = clean_price(row.get("Цена в промоция"))
+                price_val = p_promo if p_promo > 0 else clean_price(row.get("Цена на дребно"))
+                if price_val <= 0: continue
+
+                # FIX: Only use category if it's a valid digit, otherwise NULL
+                raw_cat = row.get("Категория")
+                cat_id = int(raw_cat) if (raw_cat and str(raw_cat).isdigit()) else None
+            except: continue
+
+            yield {
+                "name": p_name, "quantity": p_qty, "price": price_val,
+                "category_id": cat_id, "store_id": target_store_id,
+                "unit_id": units_map.get(p_unit_str),
+            }
+def parse_feed_file(zip_path, filename, store_candidates, units_map, alias_cache):
+    # Process pool entry point: materialize the rows so they can be sent back to the writer
+    stats = {}
+    rows = list(iter_feed_rows(zip_path, filename, store_candidates, units_map, alias_cache, stats))
+    return rows, alias_cache, stats
+def load_store_aliases(engine):
+    """Returns {chain_id: {raw_address: store_id}} from the persisted store_aliases table."""
+    StoreAlias.__table__.create(engine, checkfirst=True)
+    aliases = {}
+    with Session(engine) as session:
+        for a in session.execute(select(StoreAlias)).scalars():
+            aliases.setdefault(a.chain_id, {})[a.raw_address] = a.store_id
+    return aliases
+FEED_URL_TEMPLATE = 'https://kolkostruva.bg/opendata_files/{date}.zip'
+def feed_date_from_url(url):
+    m = re.search(r'(\d{4}-\d{2}-\d{2})', os.path.basename(url))
+    return m.group(1) if m else None
+def product_key(row):
+    return (row["store_id"], row["name"], row["quantity"])
+def product_content_hash(row):
+    # Everything that is not part of the product key; unchanged rows are skipped on incremental imports
+    return hash((row["price"], row["category_id"], row["unit_id"]))
+def load_product_keys(conn):
+    """Returns {(store_id, name, quantity): (product_id, content_hash)}, keeping the oldest row per key."""
+    existing = {}
+    rows = conn.execute(select(
+        Product.id, Product.store_id, Product.name, Product.quantity, Product.price, Product.category_id, Product.unit_id
+    ).order_by(Product.id)).mappings()
+    for row in rows:
+        key = product_key(row)
+        if key not in existing:
+            existing[key] = (row["id"], product_content_hash(row))
+    return existing
+def write_feed_rows(conn, rows, batch_size, existing=None, seen=None, history_day=None):
+    """Writes parsed feed rows in batches and returns (inserted, updated, unchanged).
+
+    With existing (see load_product_keys) rows are upserted by product key: new keys
+    are inserted, changed ones updated in place, and rows whose content hash matches
+    are skipped. seen collects the keys written during this import, so a key repeated
+    within the feed keeps its first row. Without existing every row is appended.
+    With history_day every insert and update is also recorded in price_history.
+    """
+    product_insert = insert(Product).returning(Product.id, sort_by_parameter_order=True)
+    product_update = update(Product).where(Product.id == bindparam("b_id")).values(
+        price=bindparam("b_price"), category_id=bindparam("b_category_id"), unit_id=bindparam("b_unit_id"),
+    )
+    if seen is None: seen = set()
+    counts = [0, 0, 0]
+    inserts, updates = [], []
+
+    def record_history(entries):
+        if history_day is not None and entries:
+            conn.execute(insert(PriceHistory), [
+                {"product_id": pid, "store_id": row["store_id"], "category_id": row["category_id"],
+                 "day": history_day, "price": row["price"]}
+                for pid, row in entries
+            ])
+    def flush_inserts():
+        if not inserts: return
+        ids = conn.execute(product_insert, inserts).scalars().all()
+        record_history(zip(ids, inserts))
+        if existing is not None:
+            for pid, row in zip(ids, inserts):
+                existing[product_key(row)] = (pid, product_content_hash(row))
+        counts[0] += len(inserts)
+        inserts.clear()
+    def flush_updates():
+        if not updates: return
+        conn.execute(product_update, [
+            {"b_id": pid, "b_price": row["price"], "b_category_id": row["category_id"], "b_unit_id": row["unit_id"]}
+            for pid, row in updates
+        ])
+        record_history(updates)
+        counts[1] += len(updates)
+        updates.clear()
+
+    for row in rows:
+        if existing is not None:
+            key = product_key(row)
+            if key in seen:
+                counts[2] += 1
+                continue
+            seen.add(key)
+            current = existing.get(key)
+            if current is None:
+                inserts.append(row)
+            elif current[1] == product_content_hash(row):
+                counts[2] += 1
+                continue
+            else:
+                updates.append((current[0], row))
+                existing[key] = (current[0], product_content_hash(row))
+        else:
+            inserts.append(row)
+        if len(inserts) >= batch_size: flush_inserts()
+        if len(updates) >= batch_size: flush_updates()
+    flush_inserts()
+    flush_updates()
+    return tuple(counts)
+def process_feed(url, engine, batch_size=FEED_BATCH_SIZE, workers=1, persist_aliases=False,
+                 incremental=False, feed_date=None):
+    """Imports a kolkostruva.bg ZIP (URL or local path), inserting products in batches.
+
+    With workers > 1 each chain's CSV is parsed and store-matched in a process pool;
+    this process stays the only writer and inserts files in archive order, so the
+    result is identical to a serial import.
+
+    With persist_aliases, raw store addresses resolved to a store are saved in
+    store_aliases and reused by later imports without fuzzy matching. Addresses
+    that matched nothing are only cached for the current run, so stores added
+    later still get a chance to match.
+
+    With incremental, a feed date (taken from the URL unless given) that is already
+    recorded in feed_imports is skipped, and products are upserted by
+    (store, name, quantity) instead of appended. Files are committed one at a time
+    under WAL, so a running app keeps reading while the refresh happens.
+    """
+    FeedImport.__table__.create(engine, checkfirst=True)
+    PriceHistory.__table__.create(engine, checkfirst=True)
+    if feed_date is None:
+        feed_date = feed_date_from_url(url)
+    history_day = encode_day(feed_date or date.today())
+    if incremental and feed_date:
+        with Session(engine) as session:
+            if session.execute(select(FeedImport).where(FeedImport.feed_date == feed_date)).scalar_one_or_none():
+                print(f"Feed {feed_date} already imported, skipping.")
+                return
+
+    with Session(engine) as session:
+        chains_map = {cn.name.lower(): cn.chain_id for cn in session.execute(select(ChainName)).scalars()}
+        chain_id_to_name = {c.id: c.name for c in session.execute(select(Chain)).scalars()}
+        units_map = {u.name: u.id for u in session.execute(select(Unit)).scalars()}
+        stores_by_chain = {}
+        # Only the columns matching needs, so a DB from before stores.lat/lon still imports
+        for s_id, chain_id, address in session.execute(select(Store.id, Store.chain_id, Store.address)):
+            stores_by_chain.setdefault(chain_id, []).append((s_id, normalize_address(address)))
+    known_aliases = load_store_aliases(engine) if persist_aliases else {}
+    # One cache per chain for the whole run, seeded from persisted aliases
+    alias_caches = {cid: dict(known_aliases.get(cid, {})) for cid in stores_by_chain}
+
+    is_local = os.path.exists(url)
+    with timer("feed.download"):
+        zip_path = url if is_local else download_feed(url)
+    total_count = 0
+    counts = [0, 0, 0]
+    started = time.perf_counter()
+    try:
+        jobs = []
+        with zipfile.ZipFile(zip_path) as z:
+            for filename in z.namelist():
+                if not filename.endswith('.csv'): continue
+                matched_chain_id = next((cid for name, cid in chains_map.items() if name in filename.lower()), None)
+                if not matched_chain_id: continue
+                if not stores_by_chain.get(matched_chain_id): continue
+                jobs.append((filename, matched_chain_id, chain_id_to_name.get(matched_chain_id, "Unknown Chain"), stores_by_chain[matched_chain_id]))
+
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else contextlib.nullcontext()
+        with pool, engine.connect() as conn:
+            for pragma in LOAD_PRAGMAS:
+                conn.exec_driver_sql(pragma)
+            existing = load_product_keys(conn) if incremental else None
+            if incremental:
+                # Unchanged rows write no history; products with none at all get it as of this feed
+                seed_price_history(conn, history_day)
+                conn.commit()
+            seen = set()
+
+            if workers > 1:
+                results = pool.map(
+                    parse_feed_file,
+                    [zip_path] * len(jobs), [j[0] for j in jobs], [j[3] for j in jobs],
+                    [units_map] * len(jobs), [alias_caches[j[1]] for j in jobs],
+                )
+            else:
+                def run_serial(job):
+                    stats = {}
+                    cache = alias_caches[job[1]]
+                    return iter_feed_rows(zip_path, job[0], job[3], units_map, cache, stats), cache, stats
+                results = map(run_serial, jobs)
+
+            totals = {}
+            file_started = time.perf_counter()
+            for (filename, chain_id, chain_display_name, _), (rows, cache, stats) in zip(jobs, results):
+                file_counts = write_feed_rows(conn, rows, batch_size, existing, seen, history_day)
+                inserted, updated, unchanged = file_counts
+                counts = [a + b for a, b in zip(counts, file_counts)]
+                added_count = inserted + updated + unchanged
+
+                # Pool workers send back their own copy of the cache; keep it for later files of the chain
+                alias_caches[chain_id] = cache
+                if persist_aliases:
+                    known = known_aliases.setdefault(chain_id, {})
+                    new_aliases = [
+                        {"chain_id": chain_id, "raw_address": raw, "store_id": sid}
+                        for raw, sid in cache.items() if sid and raw not in known
+                    ]
+                    if new_aliases:
+                        conn.execute(insert(StoreAlias), new_aliases)
+                        known.update((a["raw_address"], a["store_id"]) for a in new_aliases)
+                conn.commit()
+
+                for k, v in stats.items():
+                    totals[k] = totals.get(k, 0) + v
+                total_count += added_count
+                elapsed = time.perf_counter() - file_started
+                observe("feed.file", elapsed * 1000)
+                rate = added_count / elapsed if elapsed > 0 else 0
+                print(f"Processed {filename} ({chain_display_name}): {inserted} new, {updated} updated, {unchanged} unchanged "
+                      f"in {elapsed:.2f}s ({rate:,.0f} rows/s); "
+                      f"stores matched {stats['matched']}, cached {stats['cached']}, rejected {stats['rejected']}.")
+                file_started = time.perf_counter()
+    finally:
+        if not is_local: os.remove(zip_path)
+
+    elapsed = time.perf_counter() - started
+    observe("feed.import", elapsed * 1000)
+    count("feed.rows", total_count)
+    for name, n in zip(("inserted", "updated", "unchanged"), counts):
+        count(f"feed.rows_{name}", n)
+    # Store matching: rows fuzzy-matched / served from the alias cache / rejected, and fuzzy calls
+    for k, v in totals.items():
+        count(f"feed.match_{k}", v)
+    rate = total_count / elapsed if elapsed > 0 else 0
+    print(f"Feed import done: {total_count} products in {elapsed:.2f}s ({rate:,.0f} rows/s, workers={workers}); "
+          f"{counts[0]} new, {counts[1]} updated, {counts[2]} unchanged.")
+    if totals:
+        print(f"Store matching: {totals['matched']} matched, {totals['cached']} cached, {totals['rejected']} rejected "
+              f"({totals['fuzzy_calls']} fuzzy lookups).")
+    if feed_date:
+        with Session(engine) as session:
+            record = session.execute(select(FeedImport).where(FeedImport.feed_date == feed_date)).scalar_one_or_none()
+            if not record:
+                record = FeedImport(feed_date=feed_date)
+                session.add(record)
+            record.url = url
+            record.imported_at = datetime.now().isoformat(timespec="seconds")
+            record.inserted, record.updated, record.unchanged = counts
+            session.commit()
+    with timer("feed.summary"):
+        refresh_price_summary(engine)
+    rebuild_price_index(engine)
+def refresh_prices(engine, date, **kwargs):
+    """Incrementally imports the kolkostruva.bg feed for date (YYYY-MM-DD) into an existing DB."""
+    return process_feed(FEED_URL_TEMPLATE.format(date=date), engine, incremental=True, feed_date=date, **kwargs)
@@ -0,0 +1,140 @@
+"""Stage timings and counters for the hot paths (ranking, feed import, web requests).
+
+Two independent switches, both off by default:
+  * REGISTRY.enabled: every timed stage goes into a process-wide histogram and
+    counters are summed; the web app turns it on (PRICE_METRICS, default 1) and
+    serves it at /metrics.
+  * a per-thread trace (start_trace / end_trace): one request's stage timings,
+    sent back in a Server-Timing header when the request asks for profiling.
+With both off, timer() returns a shared no-op and count() only checks the two switches.
+"""
+import bisect, threading, time
+
+# Upper bounds in ms, Prometheus style (le=...); the last bucket is +Inf
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        cumulative, total = [], 0
+        for le, n in zip(self.buckets + ("+Inf",), self.counts):
+            total += n
+            cumulative.append((le, total))
+        return {"count": self.count, "sum_ms": round(self.sum, 3), "buckets": cumulative}
+
+class Registry:
+    """Process-wide histograms (stage durations in ms) and counters."""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, ms):
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.observe(ms)
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "histograms": {name: h.snapshot() for name, h in sorted(self.histograms.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def render_prometheus(self, prefix="price"):
+        """Text exposition format: stage histograms as <prefix>_stage_ms, counters as <prefix>_<name>_total."""
+        snap = self.snapshot()
+        lines = [f"# TYPE {prefix}_stage_ms histogram"]
+        for name, h in snap["histograms"].items():
+            for le, n in h["buckets"]:
+                lines.append(f'{prefix}_stage_ms_bucket{{stage="{name}",le="{le}"}} {n}')
+            lines.append(f'{prefix}_stage_ms_sum{{stage="{name}"}} {h["sum_ms"]}')
+            lines.append(f'{prefix}_stage_ms_count{{stage="{name}"}} {h["count"]}')
+        for name, value in snap["counters"].items():
+            metric = f"{prefix}_{name.replace('.', '_')}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+REGISTRY = Registry()
+_local = threading.local()
+
+class _Timer:
+    __slots__ = ("name", "trace", "started")
+    def __init__(self, name, trace):
+        self.name = name
+        self.trace = trace
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, (time.perf_counter() - self.started) * 1000, self.trace)
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+_NULL_TIMER = _NullTimer()
+
+def _record(name, ms, trace):
+    if REGISTRY.enabled:
+        REGISTRY.observe(name, ms)
+    if trace is not None:
+        trace[name] = trace.get(name, 0.0) + ms
+def observe(name, ms):
+    """Records a duration measured by the caller, like a finished timer() stage."""
+    _record(name, ms, getattr(_local, "trace", None))
+def timer(name):
+    """Context manager timing one stage; a shared no-op when metrics and tracing are off."""
+    trace = getattr(_local, "trace", None)
+    if trace is None and not REGISTRY.enabled:
+        return _NULL_TIMER
+    return _Timer(name, trace)
+def count(name, n=1):
+    """Adds n to a counter (and to the current trace, if any)."""
+    if REGISTRY.enabled:
+        REGISTRY.incr(name, n)
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        counts = trace.setdefault("_counts", {})
+        counts[name] = counts.get(name, 0) + n
+def start_trace():
+    """Starts collecting this thread's stage timings, e.g. for one profiled request."""
+    _local.trace = {}
+def end_trace():
+    """Stops collecting and returns {stage: ms, "_counts": {counter: n}} (None if no trace was started)."""
+    trace = getattr(_local, "trace", None)
+    _local.trace = None
+    return trace
+def server_timing(trace):
+    """Server-Timing header value for a trace: 'rank.resolve;dur=0.123, ...'."""
+    parts = [f"{name};dur={ms:.3f}" for name, ms in trace.items() if name != "_counts"]
+    parts += [f'{name};desc="{n}"' for name, n in trace.get("_counts", {}).items()]
+    return ", ".join(parts)
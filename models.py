@@ -0,0 +1,262 @@
+from datetime import date, timedelta
+from sqlalchemy import create_engine, event, String, Integer, ForeignKey, inspect, REAL, UniqueConstraint, Index
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+class Base(DeclarativeBase):
+    pass
+class Category(Base):
+    __tablename__ = "categories"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String, unique=True)
+class Chain(Base):
+    __tablename__ = "chains"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String, unique=True)
+class Store(Base):
+    __tablename__ = "stores"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # 'lat, lon' as shown to clients; lat/lon below are the numeric values ranking uses
+    coords: Mapped[str] = mapped_column(String, nullable=True)
+    populated_area: Mapped[str] = mapped_column(String, nullable=True)
+    address: Mapped[str] = mapped_column(String, nullable=True)
+    chain_id: Mapped[int] = mapped_column(nullable=True, index=True) 
+    lat: Mapped[float|None] = mapped_column(REAL, nullable=True)
+    lon: Mapped[float|None] = mapped_column(REAL, nullable=True)
+class ChainName(Base):
+    __tablename__ = "chain_names"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String, unique=True)
+    chain_id: Mapped[int] = mapped_column(nullable=True)
+class Unit(Base):
+    __tablename__ = "units"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String, unique=True)
+class Product(Base):
+    __tablename__ = "products"
+    __table_args__ = (
+        # Cheapest-in-category per store, and per-category averages, without touching the table rows
+        Index("ix_products_store_category_price", "store_id", "category_id", "price", "quantity"),
+        Index("ix_products_category_price", "category_id", "price"),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String)
+    quantity: Mapped[float] = mapped_column(REAL, nullable=True)
+    price: Mapped[float] = mapped_column(REAL)
+    
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"))
+    store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"))
+    unit_id: Mapped[int|None] = mapped_column(ForeignKey("units.id"), nullable=True)
+class StoreAlias(Base):
+    __tablename__ = "store_aliases"
+    __table_args__ = (UniqueConstraint("chain_id", "raw_address"),)
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    chain_id: Mapped[int] = mapped_column(ForeignKey("chains.id"))
+    raw_address: Mapped[str] = mapped_column(String)
+    store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"))
+class FeedImport(Base):
+    __tablename__ = "feed_imports"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    feed_date: Mapped[str] = mapped_column(String, unique=True)
+    url: Mapped[str] = mapped_column(String, nullable=True)
+    imported_at: Mapped[str] = mapped_column(String)
+    inserted: Mapped[int] = mapped_column(Integer, default=0)
+    updated: Mapped[int] = mapped_column(Integer, default=0)
+    unchanged: Mapped[int] = mapped_column(Integer, default=0)
+class PriceHistory(Base):
+    """One row per price change of a product; day is days since 1970-01-01."""
+    __tablename__ = "price_history"
+    __table_args__ = (
+        # Covering indexes: trend per (store, category) and as-of lookups per category
+        Index("ix_price_history_store_category_day", "store_id", "category_id", "day", "product_id", "price"),
+        Index("ix_price_history_category_day", "category_id", "day", "store_id", "product_id", "price"),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
+    store_id: Mapped[int] = mapped_column(Integer)
+    category_id: Mapped[int|None] = mapped_column(Integer, nullable=True)
+    day: Mapped[int] = mapped_column(Integer)
+    price: Mapped[float] = mapped_column(REAL)
+class PriceSummary(Base):
+    """Per (store, category) price statistics, refreshed after every import; store_id NULL is the category overall.
+
+    Unit prices are price / quantity (per KG, L or piece). packs is JSON {unit: [[quantity, price, name], ...]}
+    of the pack sizes worth buying (see summary.pareto_packs); generation grows with every refresh.
+    """
+    __tablename__ = "price_summary"
+    __table_args__ = (
+        Index("ix_price_summary_category_store", "category_id", "store_id"),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    generation: Mapped[int] = mapped_column(Integer)
+    store_id: Mapped[int|None] = mapped_column(Integer, nullable=True)
+    category_id: Mapped[int] = mapped_column(Integer)
+    product_count: Mapped[int] = mapped_column(Integer)
+    min_unit_price: Mapped[float] = mapped_column(REAL)
+    avg_unit_price: Mapped[float] = mapped_column(REAL)
+    median_unit_price: Mapped[float] = mapped_column(REAL)
+    avg_price: Mapped[float] = mapped_column(REAL)
+    cheapest_product_id: Mapped[int] = mapped_column(Integer)
+    cheapest_name: Mapped[str] = mapped_column(String, nullable=True)
+    cheapest_price: Mapped[float] = mapped_column(REAL)
+    packs: Mapped[str] = mapped_column(String, nullable=True)
+class GeocodeCache(Base):
+    """Geocoder answers keyed by normalize_address(); lat/lon are NULL for addresses it couldn't find."""
+    __tablename__ = "geocode_cache"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    address_key: Mapped[str] = mapped_column(String, unique=True)
+    query: Mapped[str] = mapped_column(String, nullable=True)
+    lat: Mapped[float|None] = mapped_column(REAL, nullable=True)
+    lon: Mapped[float|None] = mapped_column(REAL, nullable=True)
+    source: Mapped[str] = mapped_column(String, nullable=True)
+    fetched_at: Mapped[str] = mapped_column(String, nullable=True)
+DAY_EPOCH = date(1970, 1, 1)
+def encode_day(d):
+    """'YYYY-MM-DD' or date -> integer day number used by price_history."""
+    if isinstance(d, str): d = date.fromisoformat(d)
+    return (d - DAY_EPOCH).days
+def decode_day(n):
+    return (DAY_EPOCH + timedelta(days=n)).isoformat()
+
+# schema migration
+def migrate(engine):
+    """Brings an existing DB up to Base.metadata in place: adds missing tables, nullable
+    columns and indexes, then refreshes planner statistics. Returns the actions taken."""
+    actions = []
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                table.create(conn)
+                actions.append(f"create table {table.name}")
+                continue
+            db_columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in db_columns: continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}')
+                actions.append(f"add column {table.name}.{column.name}")
+            db_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in db_indexes: continue
+                index.create(conn)
+                actions.append(f"create index {index.name}")
+        # Stores from before the numeric columns: parse lat/lon out of the 'lat, lon' string
+        backfilled = conn.exec_driver_sql(
+            "UPDATE stores SET lat = CAST(trim(substr(coords, 1, instr(coords, ',') - 1)) AS REAL), "
+            "lon = CAST(trim(substr(coords, instr(coords, ',') + 1)) AS REAL) "
+            "WHERE lat IS NULL AND instr(coords, ',') > 0"
+        ).rowcount
+        if backfilled > 0:
+            actions.append(f"backfill stores.lat/lon for {backfilled} stores")
+        # Products from before price_history: their current price, as of the last recorded
+        # import (day 0 if none), so trends and as-of lookups see them
+        from history import seed_price_history
+        last_feed = conn.exec_driver_sql("SELECT max(feed_date) FROM feed_imports").scalar()
+        seeded = seed_price_history(conn, encode_day(last_feed) if last_feed else 0)
+        if seeded > 0:
+            actions.append(f"seed price_history for {seeded} products")
+        if actions:
+            conn.exec_driver_sql("ANALYZE")
+    # Ranking reads only price_summary; fill it for DBs imported before it existed
+    from summary import summary_is_stale, refresh_price_summary
+    if summary_is_stale(engine):
+        actions.append(f"refresh price_summary ({refresh_price_summary(engine)} rows)")
+    if actions:
+        # Pooled connections keep the planner statistics they were opened with
+        engine.dispose()
+    return actions
+# serving
+def prepare_db(db_path):
+    """One-off writable deploy step (cli.py migrate): migrate and switch the file to WAL, so
+    readers never block on (or get blocked by) a concurrent import."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    actions = migrate(engine)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+    engine.dispose()
+    return actions
+def schema_problems(engine):
+    """What migrate() would still have to do, found by read-only inspection: missing tables,
+    columns and indexes, and an unfilled price_summary."""
+    problems = []
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            problems.append(f"missing table {table.name}")
+            continue
+        db_columns = {c["name"] for c in inspector.get_columns(table.name)}
+        problems += [f"missing column {table.name}.{c.name}" for c in table.columns if c.name not in db_columns]
+        db_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        problems += [f"missing index {i.name}" for i in table.indexes if i.name not in db_indexes]
+    from summary import summary_is_stale
+    if not problems and summary_is_stale(engine):
+        problems.append("price_summary not filled")
+    return problems
+def check_schema(engine):
+    """Raises RuntimeError if the DB needs `python cli.py migrate` first; web workers never migrate."""
+    problems = schema_problems(engine)
+    if problems:
+        raise RuntimeError(f"{engine.url.database} is not migrated ({', '.join(problems)}); "
+                           "run `python cli.py migrate` before starting the app")
+def create_read_engine(db_path, pool_size=8):
+    """Read-only engine for web workers: pooled connections (one per request thread at a time),
+    each with query_only set and a larger page cache / mmap window."""
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        pool_size=pool_size, max_overflow=pool_size,
+        connect_args={"check_same_thread": False},
+    )
+
+    @event.listens_for(engine, "connect")
+    def _read_only_pragmas(dbapi_conn, _):
+        cursor = dbapi_conn.cursor()
+        for pragma in ("PRAGMA query_only=ON", "PRAGMA cache_size=-32768", "PRAGMA mmap_size=268435456"):
+            cursor.execute(pragma)
+        cursor.close()
+    return engine
+# Hot queries of the ranking and import paths, with sample parameters for EXPLAIN QUERY PLAN
+HOT_QUERIES = {
+    "cheapest_in_store_category": (
+        "SELECT id, price FROM products WHERE store_id = ? AND category_id = ? ORDER BY price LIMIT 1", (1, 1)),
+    "category_averages": (
+        "SELECT category_id, avg(price) FROM products GROUP BY category_id", ()),
+    "price_summary_category": (
+        "SELECT store_id, min_unit_price FROM price_summary WHERE category_id = ?", (1,)),
+    "stores_by_chain": (
+        "SELECT id, address FROM stores WHERE chain_id = ?", (1,)),
+    "price_trend_start": (
+        "SELECT product_id, max(day) FROM price_history WHERE store_id = ? AND category_id = ? AND day <= ? "
+        "GROUP BY product_id", (1, 1, 0)),
+    "price_trend_window": (
+        "SELECT day, product_id, price FROM price_history WHERE store_id = ? AND category_id = ? AND day > ? AND day <= ? "
+        "ORDER BY day", (1, 1, 0, 30)),
+    "basket_on_date": (
+        "SELECT category_id, store_id, product_id, max(day) FROM price_history WHERE category_id IN (?, ?) AND day <= ? "
+        "GROUP BY product_id, category_id, store_id", (1, 2, 0)),
+    "history_row": (
+        "SELECT price FROM price_history WHERE category_id = ? AND day = ? AND store_id = ? AND product_id = ?", (1, 0, 1, 1)),
+}
+def explain(engine, sql, params=()):
+    with engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+def check_query_plans(engine, queries=HOT_QUERIES):
+    """Returns {query_name: plan_lines} for hot queries that scan a table instead of using an index."""
+    problems = {}
+    for name, (sql, params) in queries.items():
+        plan = explain(engine, sql, params)
+        if any(line.startswith("SCAN") and "COVERING INDEX" not in line for line in plan):
+            problems[name] = plan
+    return problems
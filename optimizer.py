@@ -0,0 +1,116 @@
+import heapq, itertools, math
+import numpy as np
+from ranking import get_price_index, get_category_resolver, select_candidates, resolve_items, chosen_item, KM_COST_BGN
+
+def pairwise_km(lats, lons):
+    """Haversine distance matrix in KM between points given in radians."""
+    dlat = lats[:, None] - lats[None, :]
+    dlon = lons[:, None] - lons[None, :]
+    a = np.sin(dlat / 2)**2 + np.cos(lats)[:, None] * np.cos(lats)[None, :] * np.sin(dlon / 2)**2
+    dist = 6371.0 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return np.where(np.isnan(dist), 999.0, dist)
+def best_route(stops, user_dist, store_dist):
+    """Shortest one-way trip from the user through every stop; returns (km, ordered stops)."""
+    best = (math.inf, stops)
+    for order in itertools.permutations(stops):
+        km = user_dist[order[0]] + sum(store_dist[a, b] for a, b in zip(order, order[1:]))
+        if km < best[0]:
+            best = (km, order)
+    return best
+def get_split_plans(engine, shopping_list, user_coords_str, max_stops=2, price_index=None, resolver=None,
+                    radius_km=None, max_stores=None, max_candidates=30, top_n=5):
+    """Cheapest ways to buy the list across 1..max_stops stores, best first.
+
+    Each item is bought at the cheapest store of the plan (priced the same way as in
+    get_store_rankings, amounts included). Items no store in the plan has cost the usual
+    missing-item penalty, and the route user -> stop -> stop costs KM_COST_BGN per km.
+    The search is a depth-first branch-and-bound over the max_candidates stores with
+    the best single-store score. A partial plan is dropped once its route cost plus
+    the cheapest possible basket can't beat the top_n-th plan found so far.
+    """
+    if price_index is None:
+        price_index = get_price_index(engine)
+    if resolver is None:
+        resolver = get_category_resolver(engine)
+
+    fixed_penalty, matched_items, item_penalties = resolve_items(resolver, price_index, shopping_list)
+    item_penalties = np.array(item_penalties)
+
+    rows, dist = select_candidates(price_index, user_coords_str, radius_km, max_stores)
+    prices = np.full((len(rows), len(matched_items)), np.nan)
+    for j, (_, cat_id, amount, unit) in enumerate(matched_items):
+        prices[:, j] = price_index.item_prices(rows, cat_id, amount, unit)
+    found = ~np.isnan(prices)
+    single = np.where(found, prices, 0.0).sum(axis=1) + np.where(found, 0.0, item_penalties).sum(axis=1) + dist * KM_COST_BGN
+    useful = np.flatnonzero(found.any(axis=1))
+    cand = useful[np.argsort(single[useful], kind='stable')][:max_candidates]
+    if len(cand) == 0:
+        return []
+
+    prices, dist = prices[cand], dist[cand]
+    store_dist = pairwise_km(price_index.store_lat[rows[cand]], price_index.store_lon[rows[cand]])
+    # No plan over these candidates can have a cheaper basket than this: each item costs at least
+    # its cheapest price among them, or its missing-item penalty if a plan leaves it out
+    cheapest_anywhere = np.where(np.isnan(prices), np.inf, prices).min(axis=0)
+    basket_floor = float(np.minimum(cheapest_anywhere, item_penalties).sum()) + fixed_penalty
+
+    heap = []  # (-score, tiebreak, plan) keeps the top_n lowest scores
+    counter = itertools.count()
+
+    def evaluate(stops):
+        sub = prices[list(stops)]
+        missing = np.isnan(sub).all(axis=0)
+        pick = np.argmin(np.where(np.isnan(sub), np.inf, sub), axis=0)
+        # A stop that supplies nothing only adds travel; the smaller plan covers it
+        if any(not np.any((pick == i) & ~missing) for i in range(len(stops))):
+            return
+        basket = float(np.where(missing, 0.0, sub[pick, np.arange(len(pick))]).sum())
+        penalty = float(np.where(missing, item_penalties, 0.0).sum()) + fixed_penalty
+        km, route = best_route(stops, dist, store_dist)
+        km = float(km)
+        score = basket + penalty + km * KM_COST_BGN
+        if len(heap) < top_n or score < -heap[0][0]:
+            plan = (score, basket, km, route, stops, pick, missing)
+            heapq.heappush(heap, (-score, next(counter), plan))
+            if len(heap) > top_n:
+                heapq.heappop(heap)
+
+    def search(start, stops):
+        for i in range(start, len(cand)):
+            new_stops = stops + (i,)
+            if len(heap) >= top_n:
+                km, _ = best_route(new_stops, dist, store_dist)
+                # Adding stops never shortens the route and the basket can't beat the floor
+                if km * KM_COST_BGN + basket_floor >= -heap[0][0]:
+                    continue
+            evaluate(new_stops)
+            if len(new_stops) < max_stops:
+                search(i + 1, new_stops)
+    search(0, ())
+
+    plans = []
+    for _, _, (score, basket, km, route, stops, pick, missing) in sorted(heap, key=lambda h: (-h[0], h[1])):
+        stop_dicts = []
+        for i in route:
+            store_id, chain_name, address, coords = price_index.stores[rows[cand[i]]]
+            position = stops.index(i)
+            chosen = []
+            for j, (user_item, cat_id, amount, unit) in enumerate(matched_items):
+                if missing[j] or pick[j] != position: continue
+                chosen.append(chosen_item(price_index, store_id, user_item, cat_id, amount, unit))
+            stop_dicts.append({
+                "store_id": store_id,
+                "chain_name": chain_name,
+                "address": address,
+                "coords": coords,
+                "chosen_items": chosen,
+                "subtotal": round(sum(c["price"] for c in chosen), 2),
+            })
+        plans.append({
+            "stores": stop_dicts,
+            "real_price": round(basket, 2),
+            "distance_km": round(km, 2),
+            "missing_count": len(shopping_list) - int((~missing).sum()),
+            "internal_score": score,
+        })
+    return plans
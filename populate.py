@@ -0,0 +1,202 @@
+from sqlalchemy import create_engine, select, inspect, text
+from sqlalchemy.orm import Session
+from models import Base, Category, Chain, Store, ChainName, Unit
+
+stores = {
+    'Lidl':['lidl', 'лидл'],
+    'Kaufland':['kaufland', 'кауфланд', 'кауфленд'],
+    'Burlex':['бурлекс', 'burlex', 'burleks'],
+    'Metro':['метро', 'metro'],
+    'Billa':['билла', 'била', 'billa'],
+    'MyMarket':['mymarket', 'my market', 'маймаркет', 'май маркет'],
+    'BulMag':['булмаг', 'bulmag']
+}
+def show_all_data(engine):
+    inspector = inspect(engine)
+    table_names = inspector.get_table_names()
+    with engine.connect() as connection:
+        if not table_names:
+            print("The database is empty (no tables found).")
+            return
+        for table in table_names:
+            print(f"\n=== TABLE: {table.upper()} ===")
+            result = connection.execute(text(f"SELECT * FROM {table}"))
+            rows = result.fetchall()
+            if not rows:
+                print("  (Empty)")
+            else:
+                print(f"  Columns: {result.keys()}")
+                for row in rows:
+                    print(f"  {row}")
+            print("-" * 30)
+
+# populate db
+def create_db(db_path="price_comparison.db"):
+    engine = create_engine(f"sqlite:///{db_path}", echo=False)
+    Base.metadata.create_all(engine)
+    return engine
+def populate_chains(engine, stores):
+    with Session(engine) as session:
+        for store_name in stores.keys():
+            stmt = select(Chain).where(Chain.name == store_name)
+            existing_chain = session.execute(stmt).scalar_one_or_none()
+            if not existing_chain:
+                session.add(Chain(name=store_name))
+        session.commit()
+def populate_chain_names(engine, stores_dict):
+    with Session(engine) as session:
+        for main_chain_name, variations in stores_dict.items():
+            stmt = select(Chain).where(Chain.name == main_chain_name)
+            main_chain = session.execute(stmt).scalar_one_or_none()
+            if not main_chain:
+                main_chain = Chain(name=main_chain_name)
+                session.add(main_chain)
+                session.flush()
+            for variant in variations:
+                stmt_v = select(ChainName).where(ChainName.name == variant)
+                if not session.execute(stmt_v).scalar_one_or_none():
+                    session.add(ChainName(name=variant, chain_id=main_chain.id))
+        session.commit()
+def populate_units(engine):
+    target_units = ['L', 'KG', 'бр']
+    with Session(engine) as session:
+        for unit_name in target_units:
+            stmt = select(Unit).where(Unit.name == unit_name)
+            if not session.execute(stmt).scalar_one_or_none():
+                session.add(Unit(name=unit_name))
+        session.commit()
+def populate_categories(engine):
+    raw_text = """1. Бял хляб от 500 гр. до 1 кг
+2. Хляб Добруджа от 500 гр. до 1 кг
+3. Ръжен хляб от 400 гр. до 600 гр.
+4. Типов хляб от 400 гр. до 600 гр.
+5. Точени кори от 400 гр. до 500 гр.
+6. Прясно мляко от 2 % до 3.6 % 1 л
+7. Кисело мляко от 2 % до 3.6 % в кофички от 370 гр. до 500 гр.
+8. Сирене от краве мляко насипно 1 кг
+9. Сирене от краве мляко пакетирано от 200 гр. до 1 кг
+10. Кашкавал от краве мляко насипно 1 кг
+11. Кашкавал от краве мляко пакетирано от 200 гр. до 1 кг
+12. Краве масло от 125 гр. до 250 гр.
+13. Извара насипна 1 кг
+14. Извара пакетирана от 200 гр. до 1 кг
+15. Прясно охладено пиле 1 кг (цяло)
+16. Пилешко филе, охладено, 1 кг
+17. Пилешки бут, цял, охладен 1 кг
+18. Прясно свинско месо плешка 1 кг
+19. Прясно свинско месо бут 1 кг
+20. Прясно свинско месо шол 1 кг
+21. Прясно свинско месо врат 1 кг
+22. Свинско месо за готвене 1 кг
+23. Телешко месо шол 1 кг
+24. Телешко месо за готвене 1 кг
+25. Мляно месо смес 60/40, насипно за 1 кг
+26. Кренвирши, насипни за 1 кг
+27. Колбаси пресни от 300 гр. до 1 кг
+28. Колбаси сухи (Шпек, Бургас, Деликатесен) от 250 гр. до 1 кг
+29. Риба замразена (скумрия, пъстърва, лаврак, ципура) 1 кг
+30. Риба охладена (скумрия, пъстърва, лаврак, ципура) 1 кг
+31. Яйца размер М от 6 бр. до 10 бр. Подово отглеждане
+32. Яйца размер L 6 бр. до 10 бр. Подово отглеждане
+33. Боб, пакетиран 1 кг
+34. Леща, пакетиран 1 кг
+35. Бисерен ориз 1 кг
+36. Макарони от 400 гр. до 500 гр.
+37. Спагети (№ 3, № 5 и № 10) 500 гр.
+38. Бяла захар 1 кг
+39. Готварска сол 1 кг
+40. Брашно тип 500 1 кг
+41. Брашно екстра 1 кг
+42. Олио слънчогледово 1 л
+43. Зехтин 1л
+44. Винен оцет 700 мл.
+45. Ябълков оцет 700 мл.
+46. Консерви боб, от 400 гр. до 800 гр.
+47. Консерви грах, от 400 гр. до 800 гр.
+48. Консервирани домати, от 400 гр. до 800 гр.
+49. Лютеница, от 400 гр. до 800 гр.
+50. Лимони, насипни 1кг
+51. Портокали, насипни 1кг
+52. Банани 1кг
+53. Ябълки, насипни 1кг
+54. Домати, червени, насипни 1кг
+55. Кромид лук, насипен 1кг
+56. Моркови, насипни 1кг
+57. Бяло зеле 1кг
+58. Краставици, насипни 1кг
+59. Зрял чесън 1кг
+60. Пресни гъби, насипни 1кг
+61. Картофи, насипни 1кг
+62. Маслини, насипни 1 кг
+63. Каша (млечна, плодова) от 190 гр. до 250 гр.
+64. Детско пюре от 190 гр. до 250 гр.
+65. Адаптирани млека от 400 гр. до 800 гр.
+66. Обикновени бисквити
+67. Кроасани от 50 гр. до 110 гр.
+68. Баница от 100 гр. до 500 гр.
+69. Шоколад, млечен, от 80 гр. до 100 гр.
+70. Кафе мляно от 200 гр. до 250 гр.
+71. Кафе на зърна 1 кг
+72. Чай (билков на пакетчета)
+73. Минерална вода, 6 бр. в опаковка по 1,5 л.
+74. Светла бира 2 л.
+75. Бяло вино бутилирано, произход България 750 мл.
+76. Червено вино бутилирано, произход България 750 мл.
+77. Ракия, произход България 700 мл.
+78. Тютюневи изделия, произход България, кутия, пакет
+79. Течен препарат за миене на съдове от 400 мл.
+80. Четка за зъби – средна твърдост
+81. Паста за зъби, туба от 50 мл. до 125 мл.
+82. Шампоан за нормална коса – от 250 мл. до 500 мл.
+83. Сапун, твърд
+84. Класически мокри кърпи пакет
+85. Тоалетна хартия 8 ролки"""
+    with Session(engine) as session:
+        lines = raw_text.strip().split('\n')
+        for line in lines:
+            if not line: continue
+            parts = line.split('.', 1)
+            if len(parts) == 2:
+                cat_id = int(parts[0].strip())
+                cat_name = parts[1].strip()
+                stmt = select(Category).where(Category.id == cat_id)
+                existing_cat = session.execute(stmt).scalar_one_or_none()
+                if not existing_cat:
+                    session.add(Category(id=cat_id, name=cat_name))
+        session.commit()
+def populate_varna_stores(engine):
+    varna_data = [
+        {"chain": "Lidl", "address": "ул. „Битоля“ 1А", "coords": "43.214929, 27.915363"},
+        {"chain": "Lidl", "address": "бул. „1-ви Май“ 6", "coords": "43.177129, 27.906121"},
+        {"chain": "Lidl", "address": "ул. „Мир“ 45", "coords": "43.225026, 27.930514"},
+        {"chain": "Lidl", "address": "к.к. Св. Константин и Елена, ул. „45-та\" 27", "coords": "43.231646, 28.005942"},
+        {"chain": "Lidl", "address": "бул. „Владислав Варненчик“ 257", "coords": "43.220158, 27.882653"},
+        {"chain": "Lidl", "address": "бул. „Сливница“ 176", "coords": "43.226953, 27.888197"},
+        {"chain": "Lidl", "address": "бул. „Република“ 62", "coords": "43.236310, 27.881631"},
+        {"chain": "Lidl", "address": "бул. „Света Елена“ 14", "coords": "43.245490, 27.857657"},
+        {"chain": "Kaufland", "address": "ул. „Девня“ 24", "coords": "43.202323, 27.901336"},
+        {"chain": "Kaufland", "address": "ул. „д-р Петър Скорчев“ 2", "coords": "43.222448, 27.939705"},
+        {"chain": "Kaufland", "address": "бул. „Христо Смирненски“ 2", "coords": "43.221384, 27.890324"},
+        {"chain": "Kaufland", "address": "бул. „Република“ 60", "coords": "43.235455, 27.880848"},
+        {"chain": "Kaufland", "address": "бул. „Трети март“ 77", "coords": "43.242023, 27.849658"},
+        {"chain": "Billa", "address": "бул. „Владислав Варненчик“ 48, ет. 1", "coords": "43.209377, 27.908974"},
+        {"chain": "Billa", "address": "ул. „Академик Андрей Сахаров“ 3", "coords": "43.220698, 27.898737"},
+        {"chain": "Billa", "address": "ул. „Подвис“ 25", "coords": "43.227293, 27.918539"},
+        {"chain": "Billa", "address": "бул. „Цар Освободител“ 205", "coords": "43.232633, 27.889815"},
+        {"chain": "Billa", "address": "бул. „Сливница“ 185", "coords": "43.227024, 27.875910"},
+        {"chain": "Billa", "address": "ул. „Ана Феликсова“ 12", "coords": "43.235809, 27.877266"},
+        {"chain": "BulMag", "address": "бул. „8-ми Приморски полк“ 115, Uptown ниво 1", "coords": "43.214123, 27.925877"},
+        {"chain": "BulMag", "address": "бул. „Чаталджа“ 22", "coords": "43.215958, 27.919539"},
+        {"chain": "BulMag", "address": "ул. „Академик Андрей Сахаров“ 2, Grand Mall, ет. -2", "coords": "43.217924, 27.898623"},
+        {"chain": "BulMag", "address": "бул. „Константин и Фружин“ 18", "coords": "43.246820, 27.846952"}
+    ]
+    with Session(engine) as session:
+        chains = {c.name: c.id for c in session.execute(select(Chain)).scalars()}
+        new_stores = []
+        for item in varna_data:
+            c_id = chains.get(item["chain"])
+            lat, lon = (float(x) for x in item["coords"].split(','))
+            new_stores.append(Store(address=item["address"], populated_area="Варна", coords=item["coords"],
+                                    lat=lat, lon=lon, chain_id=c_id))
+        session.add_all(new_stores)
+        session.commit()
@@ -0,0 +1,540 @@
+import json, math, time, threading
+from collections import OrderedDict
+import numpy as np
+from rapidfuzz import process, fuzz
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from models import Category, Chain, Store, PriceSummary
+from summary import summarize_products
+from units import parse_item_spec, PACKS
+from metrics import timer, count
+
+# ranking
+def haversine(coord_str1, coord_str2):
+    """Calculates distance in KM between two 'lat, lon' strings."""
+    try:
+        c1 = [float(x) for x in coord_str1.split(',')]
+        c2 = [float(x) for x in coord_str2.split(',')]
+        R = 6371.0
+        lat1, lon1 = math.radians(c1[0]), math.radians(c1[1])
+        lat2, lon2 = math.radians(c2[0]), math.radians(c2[1])
+        dlat, dlon = lat2 - lat1, lon2 - lon1
+        a = math.sin(dlat / 2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2)**2
+        return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    except:
+        return 999.0 # Penalty for invalid coords
+def parse_coords(coord_str):
+    """'lat, lon' -> (lat, lon) floats, or None if the string is not valid."""
+    try:
+        lat, lon = (float(x) for x in coord_str.split(','))
+        return lat, lon
+    except:
+        return None
+def haversine_many(coord_str, lats, lons):
+    """Distance in KM from a 'lat, lon' string to every (lats, lons) point, given in radians.
+
+    Points with NaN coordinates, or an invalid coord_str, get the same 999 km penalty as haversine.
+    """
+    origin = parse_coords(coord_str)
+    if origin is None:
+        return np.full(len(lats), 999.0)
+    lat1, lon1 = math.radians(origin[0]), math.radians(origin[1])
+    dlat, dlon = lats - lat1, lons - lon1
+    a = np.sin(dlat / 2)**2 + math.cos(lat1) * np.cos(lats) * np.sin(dlon / 2)**2
+    dist = 6371.0 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return np.where(np.isnan(dist), 999.0, dist)
+class StoreGrid:
+    """Bucket grid over store coordinates, so radius queries only look at nearby cells."""
+    def __init__(self, lats, lons, cell_deg=0.1):
+        # lats/lons in radians, as kept by PriceIndex; stores without coords are left out
+        self.cell_deg = cell_deg
+        buckets = {}
+        for i, (lat, lon) in enumerate(zip(np.degrees(lats).tolist(), np.degrees(lons).tolist())):
+            if math.isnan(lat) or math.isnan(lon): continue
+            buckets.setdefault(self.cell(lat, lon), []).append(i)
+        self.buckets = {k: np.array(v, dtype=np.int64) for k, v in buckets.items()}
+
+    def cell(self, lat, lon):
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def query(self, lat, lon, radius_km):
+        """Row indices of stores in cells overlapping the radius; callers filter by exact distance."""
+        dlat = radius_km / 111.0
+        dlon = radius_km / max(111.32 * math.cos(math.radians(lat)), 1e-6)
+        (lat0, lon0), (lat1, lon1) = self.cell(lat - dlat, lon - dlon), self.cell(lat + dlat, lon + dlon)
+        if (lat1 - lat0 + 1) * (lon1 - lon0 + 1) > len(self.buckets):
+            keys = [k for k in self.buckets if lat0 <= k[0] <= lat1 and lon0 <= k[1] <= lon1]
+        else:
+            keys = [(a, b) for a in range(lat0, lat1 + 1) for b in range(lon0, lon1 + 1) if (a, b) in self.buckets]
+        if not keys:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate([self.buckets[k] for k in keys]))
+def cheapest_cover(packs, amount, max_copies=50):
+    """Cheapest (total, [(pack index, count)]) buying at least amount from packs [(quantity, price, name)].
+
+    Tries every single pack size (any number of copies, so every amount is covered) and
+    every pair of sizes with up to max_copies of each, which is exact for the one or two
+    sizes a shelf typically has and close enough beyond that.
+    """
+    best = (math.inf, [])
+    for i, (qi, pi, _) in enumerate(packs):
+        n = math.ceil(amount / qi - 1e-9)
+        if n * pi < best[0]:
+            best = (n * pi, [(i, n)])
+        for j in range(i + 1, len(packs)):
+            qj, pj, _ = packs[j]
+            for a in range(1, min(n, max_copies) + 1):
+                rest = amount - a * qi
+                b = math.ceil(rest / qj - 1e-9) if rest > 1e-9 else 0
+                cost = a * pi + b * pj
+                if b <= max_copies and cost < best[0] - 1e-9:
+                    best = (cost, [(i, a), (j, b)] if b else [(i, a)])
+    return best
+# Bound on PriceIndex's memo of (store, category, amount, unit) -> pack mix; amounts come from clients
+COVER_CACHE_SIZE = 65536
+class PriceIndex:
+    """Cheapest product per (store_id, category_id) plus market averages, built once per import.
+
+    Alongside the dict lookups it keeps array-backed data for vectorized ranking: store
+    coordinates in radians and a (store x category) matrix of the cheapest pack price,
+    NaN where the store has nothing in the category.
+    """
+    def __init__(self, cheapest, category_averages, stores, version=None, packs=None, positions=None,
+                 unit_averages=None):
+        self.version = version
+        self.cheapest = cheapest
+        # (store_id, category_id) -> {unit: [(quantity, price, name), ...]}, Pareto-pruned pack sizes
+        self.packs = packs or {}
+        self._cover_cache = OrderedDict()
+        self._cover_lock = threading.Lock()
+        self.category_averages = category_averages
+        # category_id -> average price per KG / L / piece, for the penalty of a missing amount
+        self.unit_averages = unit_averages or {}
+        # stores: (store_id, chain_name, address, coords) in ranking order
+        self.stores = stores
+        self.store_ids = np.array([s[0] for s in stores], dtype=np.int64)
+        store_pos = {store_id: i for i, store_id in enumerate(self.store_ids.tolist())}
+        # positions: (lat, lon) per store in degrees, None to parse the coords string instead
+        positions = positions or [None] * len(stores)
+        coords = [p if p is not None else (parse_coords(s[3]) if s[3] else None) for s, p in zip(stores, positions)]
+        self.store_lat = np.radians([c[0] if c else np.nan for c in coords])
+        self.store_lon = np.radians([c[1] if c else np.nan for c in coords])
+        self.grid = StoreGrid(self.store_lat, self.store_lon)
+
+        category_ids = sorted({cat_id for _, cat_id in cheapest if cat_id is not None})
+        self.category_pos = {cat_id: j for j, cat_id in enumerate(category_ids)}
+        self.prices = np.full((len(stores), len(category_ids)), np.nan)
+        for (store_id, cat_id), (_, _, _, price) in cheapest.items():
+            if store_id in store_pos and cat_id in self.category_pos:
+                self.prices[store_pos[store_id], self.category_pos[cat_id]] = price
+
+    @classmethod
+    def from_arrays(cls, version, cheapest, packs, category_averages, stores, store_ids, store_lat, store_lon,
+                    category_ids, prices, unit_averages=None):
+        """An index over prebuilt arrays (e.g. memory-mapped from a snapshot file), lat/lon in radians.
+
+        cheapest and packs only need a .get((store_id, category_id)) lookup.
+        """
+        index = cls.__new__(cls)
+        index.version = version
+        index.cheapest = cheapest
+        index.packs = packs
+        index._cover_cache = OrderedDict()
+        index._cover_lock = threading.Lock()
+        index.category_averages = category_averages
+        index.unit_averages = unit_averages or {}
+        index.stores = stores
+        index.store_ids = store_ids
+        index.store_lat = store_lat
+        index.store_lon = store_lon
+        index.grid = StoreGrid(store_lat, store_lon)
+        index.category_pos = {cat_id: j for j, cat_id in enumerate(category_ids)}
+        index.prices = prices
+        return index
+
+    @classmethod
+    def build(cls, engine):
+        """Loads the index from price_summary and the stores; the products table is never read.
+
+        A DB without the price_summary table (not migrated yet) is summarized in memory
+        instead, by the same code an import uses to fill the table.
+        """
+        # Taken before reading, so a concurrent import shows up as a newer version
+        version = data_version(engine)
+        cheapest, packs, category_averages, unit_averages = {}, {}, {}, {}
+        with Session(engine) as session:
+            try:
+                summary = session.execute(select(*PriceSummary.__table__.c)).mappings().all()
+            except OperationalError:
+                session.rollback()
+                summary = summarize_products(session.connection())
+            for row in summary:
+                cat_id = row["category_id"]
+                if row["store_id"] is None:
+                    category_averages[cat_id] = row["avg_price"]
+                    unit_averages[cat_id] = row["avg_unit_price"]
+                    continue
+                key = (row["store_id"], cat_id)
+                cheapest[key] = (row["min_unit_price"], row["cheapest_product_id"], row["cheapest_name"],
+                                 row["cheapest_price"])
+                if row["packs"]:
+                    packs[key] = {unit: [tuple(p) for p in p_list] for unit, p_list in json.loads(row["packs"]).items()}
+
+            chains = {c.id: c.name for c in session.execute(select(Chain)).scalars()}
+            store_columns = [Store.id, Store.chain_id, Store.address, Store.coords]
+            try:
+                store_rows = session.execute(select(*store_columns, Store.lat, Store.lon).order_by(Store.id)).all()
+            except OperationalError:
+                # Not migrated yet (no lat/lon columns): the 'lat, lon' strings are all there is
+                session.rollback()
+                store_rows = [(*r, None, None) for r in session.execute(select(*store_columns).order_by(Store.id))]
+            stores = [
+                (s_id, chains.get(chain_id, 'Unknown'), address,
+                 coords or (f"{lat}, {lon}" if lat is not None else None))
+                for s_id, chain_id, address, coords, lat, lon in store_rows
+            ]
+            # Numeric lat/lon when set, else parsed from the legacy string
+            positions = [(lat, lon) if lat is not None and lon is not None else None for *_, lat, lon in store_rows]
+        return cls(cheapest, category_averages, stores, version, packs, positions, unit_averages)
+
+    def item_choice(self, store_id, cat_id, amount=None, unit=None):
+        """What the store sells for one list item: (total price, [{"name", "count", "price"}]) or None.
+
+        Without an amount this is one pack of the cheapest product per unit, and with a
+        PACKS count that many of it. With an amount, it is the cheapest mix of pack sizes in
+        that unit covering the amount. A store with no packs in the requested unit sells
+        ceil(amount) cheapest packs for "бр"; for KG / L it can't be shown to cover the
+        amount, so it counts as lacking the item (None, as when it lacks the category).
+        """
+        best = self.cheapest.get((store_id, cat_id))
+        if best is None:
+            return None
+        if amount is None or unit == PACKS:
+            n = amount or 1
+            return n * best[3], [{"name": best[2], "count": n, "price": best[3]}]
+        key = (store_id, cat_id, amount, unit)
+        with self._cover_lock:
+            if key in self._cover_cache:
+                self._cover_cache.move_to_end(key)
+                return self._cover_cache[key]
+        packs = self.packs.get((store_id, cat_id), {}).get(unit)
+        if packs:
+            total, counts = cheapest_cover(packs, amount)
+            choice = (total, [{"name": packs[i][2], "count": n, "price": packs[i][1]} for i, n in counts]) \
+                if counts else None
+        elif unit == 'бр':
+            n = math.ceil(amount - 1e-9)
+            choice = (n * best[3], [{"name": best[2], "count": n, "price": best[3]}])
+        else:
+            choice = None
+        with self._cover_lock:
+            self._cover_cache[key] = choice
+            if len(self._cover_cache) > COVER_CACHE_SIZE:
+                self._cover_cache.popitem(last=False)
+        return choice
+
+    def missing_penalty(self, cat_id, amount=None, unit=None):
+        """Score penalty for a store lacking one list item: what buying it typically costs.
+
+        The category's average pack price, times the count for PACKS; for an amount, at
+        least the average price per unit times the amount, so asking for more never makes
+        a store that lacks the item look cheaper.
+        """
+        average = self.category_averages.get(cat_id, MISSING_ITEM_PENALTY)
+        if amount is None:
+            return average
+        if unit == PACKS:
+            return average * amount
+        unit_average = self.unit_averages.get(cat_id)
+        if unit_average is None:
+            return average * math.ceil(amount - 1e-9)
+        return max(average, unit_average * amount)
+
+    def item_prices(self, rows, cat_id, amount=None, unit=None):
+        """Price of one list item at each of the store rows, NaN where the store lacks it (see item_choice)."""
+        col = self.category_pos.get(cat_id)
+        if col is None:
+            return np.full(len(rows), np.nan)
+        prices = self.prices[rows, col]
+        if amount is None:
+            return prices
+        if unit == PACKS:
+            return prices * amount
+        prices = prices.copy()
+        for i in np.flatnonzero(~np.isnan(prices)).tolist():
+            choice = self.item_choice(int(self.store_ids[rows[i]]), cat_id, amount, unit)
+            prices[i] = choice[0] if choice is not None else np.nan
+        return prices
+
+VERSION_QUERIES = (
+    "SELECT max(generation) FROM price_summary",
+    "SELECT max(id) FROM feed_imports",
+    "SELECT max(id) FROM stores",
+)
+def data_version(engine):
+    """Cheap fingerprint of the data the index is built from: summary generation, last import, last store."""
+    version = []
+    with engine.connect() as conn:
+        for sql in VERSION_QUERIES:
+            try:
+                version.append(conn.exec_driver_sql(sql).scalar())
+            except OperationalError:
+                version.append(None)
+    return tuple(version)
+_price_indexes = {}
+def get_price_index(engine):
+    key = str(engine.url)
+    if key not in _price_indexes:
+        with timer("price_index.build"):
+            _price_indexes[key] = PriceIndex.build(engine)
+    return _price_indexes[key]
+def rebuild_price_index(engine):
+    with timer("price_index.build"):
+        _price_indexes[str(engine.url)] = PriceIndex.build(engine)
+    return _price_indexes[str(engine.url)]
+VERSION_CHECK_SECONDS = 5.0
+_version_checked = {}
+def get_fresh_price_index(engine, check_interval=VERSION_CHECK_SECONDS):
+    """get_price_index, rebuilt if another process (e.g. `cli.py import`) changed the data.
+
+    The data_version check runs at most once per check_interval seconds.
+    """
+    index = get_price_index(engine)
+    key = str(engine.url)
+    now = time.monotonic()
+    if now - _version_checked.get(key, 0.0) >= check_interval:
+        _version_checked[key] = now
+        with timer("price_index.version_check"):
+            version = data_version(engine)
+        if version != index.version:
+            index = rebuild_price_index(engine)
+    return index
+class CategoryResolver:
+    """Maps free-text shopping list queries to category ids, with a bounded LRU cache shared across requests."""
+    def __init__(self, categories, min_score=70, maxsize=4096):
+        self.names = [c.name for c in categories]
+        self.ids = [c.id for c in categories]
+        self.min_score = min_score
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, engine, **kwargs):
+        with Session(engine) as session:
+            categories = session.execute(select(Category).order_by(Category.id)).scalars().all()
+        return cls(categories, **kwargs)
+
+    @staticmethod
+    def normalize(query):
+        return " ".join(query.lower().split())
+
+    def resolve(self, query):
+        """Returns the matched category id, or None if nothing scores above min_score."""
+        key = self.normalize(query)
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            self.misses += 1
+        # Fuzzy match outside the lock; two threads missing on the same key just both compute it
+        count("resolver.fuzzy_calls")
+        match = process.extractOne(key, self.names, scorer=fuzz.partial_ratio)
+        cat_id = self.ids[match[2]] if (match and match[1] >= self.min_score) else None
+        with self._lock:
+            self._cache[key] = cat_id
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return cat_id
+
+    def resolve_many(self, queries):
+        return {q: self.resolve(q) for q in queries}
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "maxsize": self.maxsize}
+
+_category_resolvers = {}
+def get_category_resolver(engine):
+    key = str(engine.url)
+    if key not in _category_resolvers:
+        _category_resolvers[key] = CategoryResolver.build(engine)
+    return _category_resolvers[key]
+KM_COST_BGN = 0.5
+UNMATCHED_ITEM_PENALTY = 3.00
+MISSING_ITEM_PENALTY = 4.00
+def select_candidates(price_index, user_coords_str, radius_km=None, max_stores=None):
+    """Store rows to score and their distance in KM, after the radius_km / max_stores limits."""
+    origin = parse_coords(user_coords_str)
+    if origin is not None and radius_km is not None:
+        rows = price_index.grid.query(origin[0], origin[1], radius_km)
+    else:
+        rows = np.arange(len(price_index.stores))
+    dist = haversine_many(user_coords_str, price_index.store_lat[rows], price_index.store_lon[rows])
+    if origin is not None and radius_km is not None:
+        keep = dist <= radius_km
+        rows, dist = rows[keep], dist[keep]
+    if origin is not None and max_stores is not None and max_stores < len(rows):
+        nearest = np.sort(np.argpartition(dist, max_stores - 1)[:max_stores])
+        rows, dist = rows[nearest], dist[nearest]
+    return rows, dist
+def resolve_items(resolver, price_index, shopping_list):
+    """Splits each list item into name and amount and resolves the name to a category.
+
+    Returns (penalty for unmatched items, [(user_item, cat_id, amount, unit)] for the matched
+    ones, per matched item penalty for stores lacking its category).
+    """
+    specs = [parse_item_spec(item) for item in shopping_list]
+    # Category match depends only on the query, so resolve each name once per request
+    resolved = resolver.resolve_many([name for name, _, _ in specs])
+    fixed_penalty = 0.0
+    matched_items, item_penalties = [], []
+    for user_item, (name, amount, unit) in zip(shopping_list, specs):
+        target_cat_id = resolved[name]
+        if target_cat_id is None:
+            fixed_penalty += UNMATCHED_ITEM_PENALTY
+        else:
+            matched_items.append((user_item, target_cat_id, amount, unit))
+            item_penalties.append(price_index.missing_penalty(target_cat_id, amount, unit))
+    return fixed_penalty, matched_items, item_penalties
+def chosen_item(price_index, store_id, user_item, cat_id, amount=None, unit=None):
+    """The chosen_items entry for one list item at a store, or None if the store lacks it."""
+    choice = price_index.item_choice(store_id, cat_id, amount, unit)
+    if choice is None:
+        return None
+    total, picked = choice
+    entry = {"name": picked[0]["name"], "price": round(total, 2), "requested_as": user_item}
+    if amount is not None:
+        entry["packs"] = [dict(p, price=round(p["price"], 2)) for p in picked]
+    return entry
+def build_rankings(price_index, rows, dist, basket, penalty, found_count, matched_items, n_items, top_k=None):
+    """Scores candidate rows (basket/penalty/found_count aligned with rows) and returns the ranking dicts."""
+    scores = basket + penalty + (dist * KM_COST_BGN)
+    candidates = np.flatnonzero(found_count > 0)
+    if top_k is not None and top_k < len(candidates):
+        candidates = candidates[np.argpartition(scores[candidates], top_k - 1)[:top_k]]
+        candidates.sort()
+    order = candidates[np.argsort(scores[candidates], kind='stable')]
+
+    ranking_data = []
+    for i in order.tolist():
+        store_id, chain_name, address, coords = price_index.stores[rows[i]]
+        chosen_items_list = []
+        for user_item, cat_id, amount, unit in matched_items:
+            entry = chosen_item(price_index, store_id, user_item, cat_id, amount, unit)
+            if entry:
+                chosen_items_list.append(entry)
+        ranking_data.append({
+            "store_id": store_id,
+            "chain_name": chain_name,
+            "address": address,
+            "coords": coords,
+            "chosen_items": chosen_items_list,
+            "real_price": round(float(basket[i]), 2),
+            "distance_km": round(float(dist[i]), 2),
+            "missing_count": n_items - int(found_count[i]),
+            "internal_score": float(scores[i])
+        })
+    return ranking_data
+def get_store_rankings(engine, shopping_list, user_coords_str, price_index=None, resolver=None, top_k=None,
+                       radius_km=None, max_stores=None):
+    """Ranks stores by basket price + missing-item penalties + travel cost, best first.
+
+    Scores are computed for all candidate stores at once on the PriceIndex arrays; only
+    the returned stores (all of them, or the best top_k) are turned into dicts.
+    radius_km limits candidates to stores within that distance (looked up through the
+    store grid) and max_stores to the nearest N; both are ignored if the user coords
+    can't be parsed.
+    Items may carry an amount ("мляко 3 л", or {"name", "amount", "unit"}); those are
+    priced as the cheapest mix of pack sizes covering it instead of a single pack.
+    """
+    if price_index is None:
+        price_index = get_price_index(engine)
+    if resolver is None:
+        resolver = get_category_resolver(engine)
+
+    with timer("rank.resolve"):
+        fixed_penalty, matched_items, item_penalties = resolve_items(resolver, price_index, shopping_list)
+    with timer("rank.candidates"):
+        rows, dist = select_candidates(price_index, user_coords_str, radius_km, max_stores)
+    count("rank.stores_scored", len(rows))
+    with timer("rank.prices"):
+        item_prices = np.full((len(rows), len(matched_items)), np.nan)
+        for j, (_, cat_id, amount, unit) in enumerate(matched_items):
+            item_prices[:, j] = price_index.item_prices(rows, cat_id, amount, unit)
+        found = ~np.isnan(item_prices)
+        found_count = found.sum(axis=1)
+        basket = np.where(found, item_prices, 0.0).sum(axis=1)
+        penalty = fixed_penalty + np.where(found, 0.0, np.array(item_penalties)).sum(axis=1)
+    with timer("rank.build"):
+        return build_rankings(price_index, rows, dist, basket, penalty, found_count, matched_items,
+                              len(shopping_list), top_k)
+class BasketState:
+    """Per-store running totals (basket sum, penalties, items found) for one shopping list.
+
+    add/remove update every store's totals for a single item in O(stores), so a client
+    adding or removing items doesn't pay for re-pricing the whole list each time.
+    """
+    def __init__(self, price_index, resolver):
+        self.price_index = price_index
+        self.resolver = resolver
+        # Held by the web layer while a request updates and ranks this basket
+        self.lock = threading.Lock()
+        n_stores = len(price_index.stores)
+        self.items = []  # (user_item, cat_id or None, amount, unit)
+        self.basket = np.zeros(n_stores)
+        self.penalty = np.zeros(n_stores)
+        self.found_count = np.zeros(n_stores, dtype=np.int64)
+
+    def _contribution(self, cat_id, amount=None, unit=None):
+        """(prices, penalty, found) arrays one item adds to every store."""
+        n_stores = len(self.price_index.stores)
+        if cat_id is None:
+            return np.zeros(n_stores), np.full(n_stores, UNMATCHED_ITEM_PENALTY), np.zeros(n_stores, dtype=np.int64)
+        prices = self.price_index.item_prices(np.arange(n_stores), cat_id, amount, unit)
+        found = ~np.isnan(prices)
+        item_penalty = self.price_index.missing_penalty(cat_id, amount, unit)
+        return np.where(found, prices, 0.0), np.where(found, 0.0, item_penalty), found.astype(np.int64)
+
+    def add(self, user_item):
+        name, amount, unit = parse_item_spec(user_item)
+        cat_id = self.resolver.resolve(name)
+        prices, penalty, found = self._contribution(cat_id, amount, unit)
+        self.basket += prices
+        self.penalty += penalty
+        self.found_count += found
+        self.items.append((user_item, cat_id, amount, unit))
+
+    def remove(self, user_item):
+        """Removes the first occurrence of user_item; unknown items are ignored."""
+        for i, (name, cat_id, amount, unit) in enumerate(self.items):
+            if name == user_item:
+                break
+        else:
+            return
+        prices, penalty, found = self._contribution(cat_id, amount, unit)
+        self.basket -= prices
+        self.penalty -= penalty
+        self.found_count -= found
+        del self.items[i]
+        if not self.items:
+            # Drop accumulated rounding error once the list is empty
+            self.basket[:] = 0.0
+            self.penalty[:] = 0.0
+
+    @property
+    def nbytes(self):
+        """Memory held by the per-store running totals."""
+        return self.basket.nbytes + self.penalty.nbytes + self.found_count.nbytes
+
+    def item_names(self):
+        return [item[0] for item in self.items]
+
+    def rank(self, user_coords_str, top_k=None, radius_km=None, max_stores=None):
+        rows, dist = select_candidates(self.price_index, user_coords_str, radius_km, max_stores)
+        matched_items = [item for item in self.items if item[1] is not None]
+        return build_rankings(self.price_index, rows, dist, self.basket[rows], self.penalty[rows],
+                              self.found_count[rows], matched_items, len(self.items), top_k)
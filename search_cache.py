@@ -0,0 +1,73 @@
+import math, time, hashlib, threading
+from collections import OrderedDict
+from ranking import parse_coords
+from units import parse_item_spec, format_item_spec
+
+# ~200 m cells: nearby users share entries, distances stay within a couple hundred metres
+SEARCH_CELL_DEG = 0.002
+
+def normalize_items(items):
+    """Sorted, lower-cased, whitespace-collapsed shopping list; order and casing don't change the result.
+
+    Dict entries {"name", "amount", "unit"} become their "name amount unit" string form.
+    """
+    items = [format_item_spec(*parse_item_spec(i)) if isinstance(i, dict) else i for i in items]
+    return sorted(" ".join(str(i).lower().split()) for i in items if i and str(i).strip())
+def snap_coords(coord_str, cell_deg=SEARCH_CELL_DEG):
+    """Snaps a 'lat, lon' string to the centre of its grid cell; invalid strings are returned as is."""
+    parsed = parse_coords(coord_str) if isinstance(coord_str, str) else None
+    if parsed is None:
+        return coord_str
+    lat, lon = ((math.floor(v / cell_deg) + 0.5) * cell_deg for v in parsed)
+    return f"{lat:.6f}, {lon:.6f}"
+
+class SearchCache:
+    """TTL + LRU cache of serialized /api/search responses.
+
+    Entries belong to one data version (PriceIndex.version); the cache empties itself
+    the first time it is asked about a newer one, i.e. after a feed import.
+    """
+    def __init__(self, maxsize=2048, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_version(self, version):
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key, version):
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, version, body):
+        """Stores a response body and returns (body, etag)."""
+        value = (body, hashlib.sha1(body).hexdigest())
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize, "ttl": self.ttl}
@@ -0,0 +1,232 @@
+"""Compact binary snapshot of the ranking data, memory-mapped by web workers.
+
+`write_snapshot` (run after an import) stores what PriceIndex and CategoryResolver
+need: store ids/coords/labels, the (store x category) cheapest price, unit price,
+product id and product-name index, category ids/names/averages, the product-name
+strings and the per-(store, category) pack options. Workers open it with
+`load_snapshot`: the arrays are read-only views of one mmap, so every worker on
+the machine shares the same pages and startup is only the header parse.
+
+The file is written next to its final path and moved into place with os.replace,
+so readers see either the old or the new snapshot, never a partial one; a worker
+that still has the old file mapped keeps using it until it reloads.
+
+Layout: MAGIC, uint64 header length, JSON header, then each array at a 64-byte
+aligned offset listed in the header. Strings are stored as one UTF-8 blob plus an
+int64 offsets array.
+"""
+import json, mmap, os, struct, tempfile, time, threading
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models import Category
+from ranking import PriceIndex, CategoryResolver
+
+MAGIC = b"PRICESNAP\x00\x00\x01"
+ALIGN = 64
+
+def _pack_strings(strings):
+    encoded = [(s or "").encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+class StringTable:
+    """Strings decoded on demand from a UTF-8 blob and its offsets."""
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+class SnapshotCheapest:
+    """dict-like (store_id, category_id) -> (unit_price, product_id, name, price) over the snapshot arrays."""
+    def __init__(self, store_pos, category_pos, unit_prices, product_ids, name_idx, prices, names):
+        self.store_pos = store_pos
+        self.category_pos = category_pos
+        self.unit_prices = unit_prices
+        self.product_ids = product_ids
+        self.name_idx = name_idx
+        self.prices = prices
+        self.names = names
+
+    def get(self, key, default=None):
+        i, j = self.store_pos.get(key[0]), self.category_pos.get(key[1])
+        if i is None or j is None or self.product_ids[i, j] < 0:
+            return default
+        return (float(self.unit_prices[i, j]), int(self.product_ids[i, j]), self.names[int(self.name_idx[i, j])],
+                float(self.prices[i, j]))
+
+class SnapshotPacks:
+    """dict-like (store_id, category_id) -> {unit: [(quantity, price, name), ...]}, JSON decoded on first use."""
+    def __init__(self, store_pos, category_pos, packs_idx, packs_json):
+        self.store_pos = store_pos
+        self.category_pos = category_pos
+        self.packs_idx = packs_idx
+        self.packs_json = packs_json
+        self._decoded = {}
+
+    def get(self, key, default=None):
+        if key not in self._decoded:
+            i, j = self.store_pos.get(key[0]), self.category_pos.get(key[1])
+            k = int(self.packs_idx[i, j]) if i is not None and j is not None else -1
+            self._decoded[key] = None if k < 0 else {
+                unit: [tuple(p) for p in packs] for unit, packs in json.loads(self.packs_json[k]).items()
+            }
+        value = self._decoded[key]
+        return default if value is None else value
+
+def snapshot_arrays(engine):
+    """Builds the snapshot contents from the DB: ({name: ndarray}, metadata dict)."""
+    index = PriceIndex.build(engine)
+    with Session(engine) as session:
+        categories = {c.id: c.name for c in session.execute(select(Category).order_by(Category.id)).scalars()}
+    category_ids = sorted(index.category_pos, key=index.category_pos.get)
+    # Every category stays resolvable, even one with no products yet (it just has an empty column)
+    category_ids += [c for c in categories if c not in index.category_pos]
+    n, m = len(index.stores), len(category_ids)
+    unit_prices = np.full((n, m), np.nan)
+    prices = np.full((n, m), np.nan)
+    product_ids = np.full((n, m), -1, dtype=np.int64)
+    name_idx = np.full((n, m), -1, dtype=np.int32)
+    packs_idx = np.full((n, m), -1, dtype=np.int32)
+    store_pos = {store_id: i for i, store_id in enumerate(index.store_ids.tolist())}
+    category_pos = {cat_id: j for j, cat_id in enumerate(category_ids)}
+    names, name_pos, packs_json = [], {}, []
+    for key, (unit_price, product_id, name, price) in index.cheapest.items():
+        i, j = store_pos.get(key[0]), category_pos.get(key[1])
+        if i is None or j is None:
+            continue
+        unit_prices[i, j], product_ids[i, j], prices[i, j] = unit_price, product_id, price
+        if name not in name_pos:
+            name_pos[name] = len(names)
+            names.append(name)
+        name_idx[i, j] = name_pos[name]
+        packs = index.packs.get(key)
+        if packs:
+            packs_idx[i, j] = len(packs_json)
+            packs_json.append(json.dumps(packs, ensure_ascii=False))
+    arrays = {
+        "store_ids": index.store_ids.astype(np.int64),
+        "store_lat": np.asarray(index.store_lat, dtype=np.float64),
+        "store_lon": np.asarray(index.store_lon, dtype=np.float64),
+        "category_ids": np.array(category_ids, dtype=np.int64),
+        "category_avg": np.array([index.category_averages.get(c, np.nan) for c in category_ids], dtype=np.float64),
+        "category_avg_unit": np.array([index.unit_averages.get(c, np.nan) for c in category_ids], dtype=np.float64),
+        "prices": prices, "unit_prices": unit_prices, "product_ids": product_ids,
+        "name_idx": name_idx, "packs_idx": packs_idx,
+    }
+    for field, strings in (("chain", [s[1] for s in index.stores]), ("address", [s[2] for s in index.stores]),
+                           ("coords", [s[3] for s in index.stores]), ("category_name", [categories.get(c, "") for c in category_ids]),
+                           ("product_name", names), ("packs", packs_json)):
+        arrays[f"{field}_blob"], arrays[f"{field}_offsets"] = _pack_strings(strings)
+    # Stores without coords are kept apart from an empty string
+    arrays["has_coords"] = np.array([s[3] is not None for s in index.stores], dtype=np.bool_)
+    return arrays, {"version": list(index.version) if index.version else None, "written_at": time.time()}
+
+def write_snapshot(engine, path):
+    """Writes the ranking snapshot for engine's DB to path, atomically; returns the file size in bytes."""
+    arrays, meta = snapshot_arrays(engine)
+    table, offset = {}, 0
+    for name, arr in arrays.items():
+        offset = -(-offset // ALIGN) * ALIGN
+        table[name] = {"offset": offset, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+        offset += arr.nbytes
+    header = json.dumps(dict(meta, arrays=table)).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGN) * ALIGN
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+            for name, arr in arrays.items():
+                f.seek(data_start + table[name]["offset"])
+                f.write(np.ascontiguousarray(arr).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates it owner-only; web workers may run as another user
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return os.path.getsize(path)
+
+class Snapshot:
+    """A memory-mapped snapshot file: read-only arrays plus the PriceIndex / CategoryResolver over them."""
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self.file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if self.mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a price snapshot")
+        (header_len,) = struct.unpack_from("<Q", self.mm, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        header = json.loads(self.mm[header_start:header_start + header_len])
+        data_start = -(-(header_start + header_len) // ALIGN) * ALIGN
+        self.meta = {k: v for k, v in header.items() if k != "arrays"}
+        self.arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+            count = int(np.prod(shape)) if shape else 1
+            self.arrays[name] = np.frombuffer(self.mm, dtype=dtype, count=count,
+                                              offset=data_start + spec["offset"]).reshape(shape)
+
+    def strings(self, field):
+        return StringTable(self.arrays[f"{field}_blob"], self.arrays[f"{field}_offsets"])
+
+    def price_index(self):
+        a = self.arrays
+        store_ids = a["store_ids"]
+        chains, addresses, coords = self.strings("chain"), self.strings("address"), self.strings("coords")
+        has_coords = a["has_coords"].tolist()
+        stores = [(store_id, chains[i], addresses[i], coords[i] if has_coords[i] else None)
+                  for i, store_id in enumerate(store_ids.tolist())]
+        category_ids = a["category_ids"].tolist()
+        store_pos = {store_id: i for i, store_id in enumerate(store_ids.tolist())}
+        category_pos = {cat_id: j for j, cat_id in enumerate(category_ids)}
+        averages = {c: avg for c, avg in zip(category_ids, a["category_avg"].tolist()) if avg == avg}
+        # Absent from snapshots written before the amount-scaled missing penalty
+        unit_averages = {c: avg for c, avg in zip(category_ids, a["category_avg_unit"].tolist()) if avg == avg} \
+            if "category_avg_unit" in a else {}
+        cheapest = SnapshotCheapest(store_pos, category_pos, a["unit_prices"], a["product_ids"], a["name_idx"],
+                                    a["prices"], self.strings("product_name"))
+        packs = SnapshotPacks(store_pos, category_pos, a["packs_idx"], self.strings("packs"))
+        version = tuple(self.meta["version"]) if self.meta.get("version") else None
+        return PriceIndex.from_arrays(version, cheapest, packs, averages, stores, store_ids, a["store_lat"],
+                                      a["store_lon"], category_ids, a["prices"], unit_averages)
+
+    def category_resolver(self, **kwargs):
+        names = self.strings("category_name")
+        categories = [Category(id=c, name=names[j]) for j, c in enumerate(self.arrays["category_ids"].tolist())]
+        return CategoryResolver(categories, **kwargs)
+
+SNAPSHOT_CHECK_SECONDS = 2.0
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+def load_snapshot(path, check_interval=SNAPSHOT_CHECK_SECONDS):
+    """(Snapshot, PriceIndex, CategoryResolver) for path, reopened when the file has been replaced.
+
+    The stat() check runs at most once per check_interval seconds per path.
+    """
+    now = time.monotonic()
+    with _snapshots_lock:
+        entry = _snapshots.get(path)
+        if entry is not None and now - entry[3] < check_interval:
+            return entry[:3]
+    stat = os.stat(path)
+    file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _snapshots_lock:
+        entry = _snapshots.get(path)
+        if entry is None or entry[0].file_id != file_id:
+            snap = Snapshot(path)
+            entry = (snap, snap.price_index(), snap.category_resolver())
+        _snapshots[path] = entry[:3] + (now,)
+    return entry[:3]
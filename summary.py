@@ -0,0 +1,81 @@
+"""Materialized price summary (price_summary): what ranking needs from products, computed once per import."""
+import json, math, statistics
+from sqlalchemy import select, insert, delete, func
+from sqlalchemy.exc import OperationalError
+from models import Product, Unit, PriceSummary
+
+def pareto_packs(packs, limit=6):
+    """Drops packs that another pack beats on both size and price; keeps the best unit prices."""
+    kept, cheapest_larger = [], math.inf
+    for qty, price, name in sorted(packs, key=lambda p: (-p[0], p[1])):
+        if price < cheapest_larger:
+            kept.append((qty, price, name))
+            cheapest_larger = price
+    kept.sort(key=lambda p: p[1] / p[0])
+    return sorted(kept[:limit])
+def summarize_products(conn):
+    """Scans products once and returns price_summary rows (without generation), store rows then category rows.
+
+    The cheapest product of a group is the lowest unit price, earliest product id on ties.
+    """
+    unit_names = {u_id: name for u_id, name in conn.execute(select(Unit.id, Unit.name))}
+    groups = {}
+    rows = conn.execute(
+        select(Product.id, Product.name, Product.price, Product.quantity, Product.store_id, Product.category_id,
+               Product.unit_id)
+        .where(Product.category_id.is_not(None))
+        .order_by(Product.id)
+    )
+    for p_id, name, price, qty, store_id, cat_id, unit_id in rows:
+        has_qty = bool(qty and qty > 0)
+        unit_price = (price / qty) if has_qty else price
+        unit = unit_names.get(unit_id, 'бр') if has_qty else 'бр'
+        for key in ((store_id, cat_id), (None, cat_id)):
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {"cheapest": None, "unit_prices": [], "prices": [], "packs": {}}
+            if group["cheapest"] is None or unit_price < group["cheapest"][0]:
+                group["cheapest"] = (unit_price, p_id, name, price)
+            group["unit_prices"].append(unit_price)
+            group["prices"].append(price)
+            if key[0] is not None:
+                group["packs"].setdefault(unit, []).append((qty if has_qty else 1.0, price, name))
+
+    summary = []
+    for (store_id, cat_id), group in sorted(groups.items(), key=lambda kv: (kv[0][0] is None, kv[0])):
+        unit_price, p_id, name, price = group["cheapest"]
+        packs = {unit: pareto_packs(p) for unit, p in group["packs"].items()}
+        summary.append({
+            "store_id": store_id, "category_id": cat_id, "product_count": len(group["prices"]),
+            "min_unit_price": unit_price,
+            "avg_unit_price": statistics.fmean(group["unit_prices"]),
+            "median_unit_price": statistics.median(group["unit_prices"]),
+            "avg_price": statistics.fmean(group["prices"]),
+            "cheapest_product_id": p_id, "cheapest_name": name, "cheapest_price": price,
+            "packs": json.dumps(packs, ensure_ascii=False) if store_id is not None else None,
+        })
+    return summary
+def refresh_price_summary(engine):
+    """Rebuilds price_summary from products in one transaction; returns the number of rows written.
+
+    Readers (WAL) keep seeing the previous summary until the commit.
+    """
+    PriceSummary.__table__.create(engine, checkfirst=True)
+    with engine.begin() as conn:
+        summary = summarize_products(conn)
+        generation = (conn.execute(select(func.max(PriceSummary.generation))).scalar() or 0) + 1
+        conn.execute(delete(PriceSummary))
+        for row in summary:
+            row["generation"] = generation
+        for i in range(0, len(summary), 5000):
+            conn.execute(insert(PriceSummary), summary[i:i + 5000])
+    return len(summary)
+def summary_is_stale(engine):
+    """True if there are products but price_summary is missing or empty (a DB from before the table)."""
+    with engine.connect() as conn:
+        has_products = conn.exec_driver_sql("SELECT 1 FROM products LIMIT 1").first() is not None
+        try:
+            has_summary = conn.exec_driver_sql("SELECT 1 FROM price_summary LIMIT 1").first() is not None
+        except OperationalError:
+            has_summary = False
+    return has_products and not has_summary
@@ -0,0 +1,23 @@
+import importlib, os
+import pytest
+from models import migrate
+from populate import stores, create_db, populate_chains, populate_units, populate_categories
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    db_path = str(tmp_path_factory.mktemp("basket") / "basket.db")
+    engine = create_db(db_path)
+    populate_chains(engine, stores)
+    populate_units(engine)
+    populate_categories(engine)
+    migrate(engine)
+    os.environ["PRICE_DB"] = db_path
+    app = importlib.import_module("app")
+    return app.app.test_client()
+
+def test_unknown_token_gets_a_server_token(client):
+    data = client.post("/api/basket", json={"token": "chosen-by-client", "items": ["мляко"]}).get_json()
+    assert data["token"] != "chosen-by-client"
+    again = client.post("/api/basket", json={"token": data["token"], "add": ["хляб"]}).get_json()
+    assert again["token"] == data["token"]
+    assert again["items"] == ["мляко", "хляб"]
@@ -0,0 +1,37 @@
+import random
+from types import SimpleNamespace
+from ranking import PriceIndex, CategoryResolver
+from optimizer import get_split_plans
+
+CATEGORIES = [SimpleNamespace(id=1, name="сирене"), SimpleNamespace(id=2, name="кафе"), SimpleNamespace(id=3, name="ориз")]
+ITEMS = ["сирене", "кафе", "ориз"]
+USER = "43.2000, 27.9000"
+
+def make_index(prices, positions):
+    """prices: {(store_id, category_id): price}; every category averages 1.0."""
+    cheapest = {key: (price, i, f"product {i}", price) for i, (key, price) in enumerate(prices.items())}
+    stores = [(store_id, f"chain {store_id}", f"address {store_id}", f"{lat}, {lon}")
+              for store_id, (lat, lon) in positions.items()]
+    return PriceIndex(cheapest, {c.id: 1.0 for c in CATEGORIES}, stores)
+
+def best_score(index, top_n, max_stops=3):
+    plans = get_split_plans(None, ITEMS, USER, max_stops=max_stops, price_index=index,
+                            resolver=CategoryResolver(CATEGORIES), top_n=top_n)
+    return plans[0]["internal_score"]
+
+def test_missing_item_penalty_cheaper_than_any_store():
+    # Buying сирене anywhere (5.0) costs more than leaving it out (penalty 1.0)
+    index = make_index({(1, 1): 5.0, (2, 2): 0.5, (3, 3): 0.5},
+                       {1: (43.201, 27.901), 2: (43.202, 27.902), 3: (43.203, 27.903)})
+    # top_n large enough that nothing is ever pruned
+    assert best_score(index, top_n=1) == best_score(index, top_n=10**6)
+
+def test_pruned_search_matches_exhaustive_search():
+    rng = random.Random(0)
+    for _ in range(30):
+        positions = {s: (43.2 + rng.uniform(-0.05, 0.05), 27.9 + rng.uniform(-0.05, 0.05)) for s in range(1, 7)}
+        prices = {(s, c.id): round(rng.uniform(0.2, 4.0), 2) for s in positions for c in CATEGORIES
+                  if rng.random() < 0.6}
+        index = make_index(prices, positions)
+        for max_stops in (1, 2, 3):
+            assert best_score(index, 1, max_stops) == best_score(index, 10**6, max_stops)
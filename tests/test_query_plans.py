@@ -0,0 +1,25 @@
+from models import migrate, check_query_plans
+from populate import stores, create_db, populate_chains, populate_units, populate_categories
+
+def test_hot_queries_use_indexes(tmp_path):
+    engine = create_db(str(tmp_path / "plans.db"))
+    populate_chains(engine, stores)
+    populate_units(engine)
+    populate_categories(engine)
+    migrate(engine)
+    assert check_query_plans(engine) == {}
+
+def test_check_query_plans_reports_table_scans(tmp_path):
+    engine = create_db(str(tmp_path / "plans.db"))
+    migrate(engine)
+    problems = check_query_plans(engine, {"unindexed": ("SELECT id FROM products WHERE name = ?", ("x",))})
+    assert list(problems) == ["unindexed"]
+
+def test_missing_index_is_reported(tmp_path):
+    engine = create_db(str(tmp_path / "plans.db"))
+    migrate(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_price_summary_category_store")
+    # Pooled connections keep planning with the schema they had
+    engine.dispose()
+    assert "price_summary_category" in check_query_plans(engine)
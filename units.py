@@ -0,0 +1,69 @@
+import math, re
+
+# Raw unit as written in feeds / shopping lists (upper-cased) -> (unit name in `units`, multiplier)
+UNIT_CONVERSIONS = {
+    'Г': ('KG', 0.001), 'ГР': ('KG', 0.001), 'КГ': ('KG', 1.0), 
+    'МЛ': ('L', 0.001), 'Л': ('L', 1.0), 'БР': ('бр', 1.0),
+    'G': ('KG', 0.001), 'GR': ('KG', 0.001), 'KG': ('KG', 1.0), 
+    'ML': ('L', 0.001), 'L': ('L', 1.0), 'M': ('L', 0.001),
+    'MЛ': ('L', 0.001), 'КG': ('KG', 1.0), 'KГ': ('KG', 1.0)
+}
+# Pseudo-unit for a number of packs ("яйца x2", {"name", "count"}): N times the single-pack choice
+PACKS = 'packs'
+# Largest amount / pack count taken from a list entry; anything bigger is treated as no amount
+MAX_ITEM_AMOUNT = 1000
+# "мляко 3 л", "картофи 2kg", "яйца 6 бр." -> name, amount, unit
+ITEM_AMOUNT_PATTERN = re.compile(
+    r'^(.*?)\s+(\d+(?:[\.,]\d+)?)\s*(' + '|'.join(sorted(UNIT_CONVERSIONS, key=len, reverse=True)) + r')\.?$', re.I
+)
+# "яйца x2", "бира ×6" -> name, pack count
+ITEM_COUNT_PATTERN = re.compile(r'^(.*?)\s+[x×](\d+)$', re.I)
+
+def parse_item_spec(item):
+    """Shopping list entry -> (query, amount, unit) with amount in KG / L / бр or a PACKS count, or (query, None, None).
+
+    Entries are plain strings with an optional trailing amount ("мляко 3 л") or pack
+    count ("яйца x2"), or dicts {"name", "amount", "unit"} / {"name", "count"} as sent by
+    API clients. Amounts are rounded to 0.001 (never down to zero); amounts above
+    MAX_ITEM_AMOUNT are ignored.
+    """
+    if isinstance(item, dict):
+        name = str(item.get('name', '')).strip()
+        if item.get('count') is not None:
+            amount, raw_unit = item['count'], PACKS
+        else:
+            amount = item.get('amount', item.get('quantity'))
+            raw_unit = str(item.get('unit') or 'бр')
+    else:
+        text = str(item).strip()
+        match = ITEM_COUNT_PATTERN.match(text)
+        if match:
+            name, amount, raw_unit = match.group(1), match.group(2), PACKS
+        else:
+            match = ITEM_AMOUNT_PATTERN.match(text)
+            if not match:
+                return str(item), None, None
+            name, amount, raw_unit = match.group(1), match.group(2), match.group(3)
+    try:
+        amount = float(str(amount).replace(',', '.'))
+    except (TypeError, ValueError):
+        return name, None, None
+    if raw_unit == PACKS:
+        if not (amount >= 1 and amount == int(amount) and amount <= MAX_ITEM_AMOUNT):
+            return name, None, None
+        return name, int(amount), PACKS
+    conversion = UNIT_CONVERSIONS.get(raw_unit.upper())
+    if conversion is None or not (0 < amount < math.inf):
+        return name, None, None
+    unit, multiplier = conversion
+    amount = max(round(amount * multiplier, 3), 0.001)
+    if amount > MAX_ITEM_AMOUNT:
+        return name, None, None
+    return name, amount, unit
+def format_item_spec(name, amount, unit):
+    """Inverse of parse_item_spec for string entries."""
+    if amount is None:
+        return name
+    if unit == PACKS:
+        return f"{name} x{amount}"
+    return f"{name} {amount:.3f}".rstrip('0').rstrip('.') + f" {unit}"